@@ -4,30 +4,74 @@ Batch processing pipeline demonstration.
 Simulates a data pipeline that reads records in configurable batches,
 applies transformations (filter, map, aggregate), and writes results.
 Shows how batch processing handles large data sets efficiently compared
-to record-by-record processing.
+to record-by-record processing, and how the same stages scale out as a
+map-reduce job over a process pool.
 
 No external dependencies required.
 
 Usage:
-    python batch_processing_example.py
+    python batch_processing_example.py          # quick demo
+    python batch_processing_example.py --bench  # also run the benchmarks (~45 s)
 """
 
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import pickle
 import random
+import tempfile
 import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress, islice
+
+try:
+    import resource  # peak RSS fallback (Unix only)
+except ImportError:
+    resource = None
+
+try:
+    import numpy as np  # optional fast path for columnar batches
+except ImportError:
+    np = None
 
 
 # ---------- Data generation ----------
 
-def generate_records(n: int):
-    """Generate synthetic sales transaction records."""
-    categories = ["Electronics", "Books", "Clothing", "Food", "Toys"]
-    regions = ["North", "South", "East", "West"]
+CATEGORIES = ["Electronics", "Books", "Clothing", "Food", "Toys"]
+REGIONS = ["North", "South", "East", "West"]
+
+
+def generate_records(n: int, columnar: bool = False):
+    """Generate synthetic sales transaction records.
+
+    With ``columnar=True`` the same records are returned as a ColumnarBatch
+    instead of a list of dicts.
+    """
     random.seed(42)
+    if columnar:
+        batch = ColumnarBatch()
+        cat_code = {c: i for i, c in enumerate(CATEGORIES)}
+        region_code = {r: i for i, r in enumerate(REGIONS)}
+        for i in range(1, n + 1):
+            batch.append(
+                i,
+                cat_code[random.choice(CATEGORIES)],
+                region_code[random.choice(REGIONS)],
+                round(random.uniform(5.0, 500.0), 2),
+                random.randint(1, 20),
+                random.random() < 0.1,
+            )
+        return batch
     return [
         {
             "id": i,
-            "category": random.choice(categories),
-            "region": random.choice(regions),
+            "category": random.choice(CATEGORIES),
+            "region": random.choice(REGIONS),
             "amount": round(random.uniform(5.0, 500.0), 2),
             "quantity": random.randint(1, 20),
             "returned": random.random() < 0.1,
@@ -36,6 +80,35 @@ def generate_records(n: int):
     ]
 
 
+def generate_record_range(start: int, stop: int, seed: int = 42, where=None):
+    """Generate records with ids start+1..stop, independently of other ranges.
+
+    Each range gets its own RNG stream, so a worker process can build its
+    slice locally instead of receiving pickled records from the parent.
+    A *where* predicate is applied during generation (predicate pushdown):
+    rejected records never reach the returned batch.
+    """
+    rng = random.Random(f"{seed}:{start}")
+    records = (
+        {
+            "id": i,
+            "category": rng.choice(CATEGORIES),
+            "region": rng.choice(REGIONS),
+            "amount": round(rng.uniform(5.0, 500.0), 2),
+            "quantity": rng.randint(1, 20),
+            "returned": rng.random() < 0.1,
+        }
+        for i in range(start + 1, stop + 1)
+    )
+    return [r for r in records if where(r)] if where else list(records)
+
+
+def stream_records(total_records: int, chunk: int = 50_000):
+    """Yield *total_records* synthetic records, generating *chunk* at a time."""
+    for lo in range(0, total_records, chunk):
+        yield from generate_record_range(lo, min(lo + chunk, total_records))
+
+
 # ---------- Pipeline stages ----------
 
 def stage_filter(batch, predicate):
@@ -59,54 +132,878 @@ def stage_aggregate(accumulator, batch, key_fn, value_fn):
 # ---------- Batch iterator ----------
 
 def iter_batches(records, batch_size):
-    """Yield successive batches from a list of records."""
-    for start in range(0, len(records), batch_size):
-        yield records[start : start + batch_size]
+    """Yield successive batches from a list, or from any iterable of records.
+
+    Iterables (e.g. the file readers below) are consumed lazily, so only one
+    batch is ever materialised.
+    """
+    if isinstance(records, list):
+        for start in range(0, len(records), batch_size):
+            yield records[start : start + batch_size]
+        return
+    it = iter(records)
+    while batch := list(islice(it, batch_size)):
+        yield batch
+
+
+# ---------- Streaming file sources ----------
+
+CSV_FIELDS = ["id", "category", "region", "amount", "quantity", "returned"]
+_CSV_TYPES = {"id": int, "amount": float, "quantity": int, "returned": lambda v: v == "1"}
+
+
+def iter_lines(path, chunk_size=1 << 20):
+    """Yield raw lines from *path*, reading fixed-size chunks from a buffered binary reader."""
+    with open(path, "rb", buffering=chunk_size) as f:
+        tail = b""
+        while chunk := f.read(chunk_size):
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()  # possibly incomplete; completed by the next chunk
+            yield from lines
+        if tail:
+            yield tail
+
+
+def read_jsonl(path, chunk_size=1 << 20):
+    """Stream records from a JSON-lines file."""
+    for line in iter_lines(path, chunk_size):
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(path, chunk_size=1 << 20):
+    """Stream records from a CSV file with a header row (no embedded newlines)."""
+    rows = csv.reader(line.decode() for line in iter_lines(path, chunk_size))
+    header = next(rows)
+    converters = [_CSV_TYPES.get(name, str) for name in header]
+    for row in rows:
+        if row:
+            yield {name: conv(value) for name, conv, value in zip(header, converters, row)}
+
+
+def write_jsonl(path, total_records, chunk=50_000):
+    """Write synthetic records without holding more than *chunk* in memory."""
+    with open(path, "w") as f:
+        for r in stream_records(total_records, chunk):
+            f.write(json.dumps(r) + "\n")
+
+
+def write_csv(path, total_records, chunk=50_000):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        for r in stream_records(total_records, chunk):
+            writer.writerow([int(r[k]) if k == "returned" else r[k] for k in CSV_FIELDS])
 
 
 # ---------- Pipeline runner ----------
 
-def run_pipeline(records, batch_size):
-    """Run the full batch-processing pipeline and return aggregated results."""
-    aggregated = {}
-    total_input = 0
-    total_after_filter = 0
-    total_after_map = 0
-    batches_processed = 0
+def process_batch(batch, aggregated, stats, key_fn=lambda r: r["category"]):
+    """Run filter → map → aggregate on one batch, updating *stats* in place."""
+    stats["total_input"] += len(batch)
+
+    # Stage 1 – Filter out returned items
+    batch = stage_filter(batch, lambda r: not r["returned"])
+    stats["total_after_filter"] += len(batch)
+
+    # Stage 2 – Compute revenue per record
+    batch = stage_map(
+        batch,
+        lambda r: {**r, "revenue": round(r["amount"] * r["quantity"], 2)},
+    )
+    stats["total_after_map"] += len(batch)
+
+    # Stage 3 – Aggregate revenue by category (or by *key_fn*)
+    stage_aggregate(aggregated, batch, key_fn, lambda r: r["revenue"])
+    stats["batches_processed"] += 1
+
+
+def _empty_stats():
+    return {
+        "aggregated": {},
+        "batches_processed": 0,
+        "total_input": 0,
+        "total_after_filter": 0,
+        "total_after_map": 0,
+    }
+
+
+def run_pipeline(records, batch_size, aggregated=None, key_fn=lambda r: r["category"]):
+    """Run the full batch-processing pipeline and return aggregated results.
 
+    *aggregated* may be any accumulator supporting ``get`` and item
+    assignment, e.g. a SpillingAggregator for high-cardinality keys.
+    """
+    stats = _empty_stats()
+    if aggregated is not None:
+        stats["aggregated"] = aggregated
     for batch in iter_batches(records, batch_size):
-        total_input += len(batch)
+        process_batch(batch, stats["aggregated"], stats, key_fn)
+    return stats
 
-        # Stage 1 – Filter out returned items
-        batch = stage_filter(batch, lambda r: not r["returned"])
-        total_after_filter += len(batch)
 
-        # Stage 2 – Compute revenue per record
-        batch = stage_map(
-            batch,
-            lambda r: {**r, "revenue": round(r["amount"] * r["quantity"], 2)},
-        )
-        total_after_map += len(batch)
+# ---------- Parallel (map-reduce) runner ----------
+
+def _run_range(start, stop, batch_size):
+    """Worker: generate and process ids start+1..stop; return a partial aggregate."""
+    stats = _empty_stats()
+    for lo in range(start, stop, batch_size):
+        batch = generate_record_range(lo, min(lo + batch_size, stop))
+        process_batch(batch, stats["aggregated"], stats)
+    return stats
+
+
+def merge_stats(parts):
+    """Reduce step: combine partial aggregates and counters from workers."""
+    merged = _empty_stats()
+    for part in parts:
+        for key, value in part["aggregated"].items():
+            merged["aggregated"][key] = merged["aggregated"].get(key, 0.0) + value
+        for counter in ("batches_processed", "total_input", "total_after_filter", "total_after_map"):
+            merged[counter] += part[counter]
+    return merged
+
+
+def run_pipeline_parallel(total_records, batch_size, workers=None, ranges_per_worker=4):
+    """Map-reduce over a process pool.
+
+    The id space is split into contiguous ranges (aligned to *batch_size*);
+    each worker generates its own records, runs every stage on its batches
+    and sends back only the per-category partial sums, so nothing larger
+    than a small dict crosses the process boundary.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_ranges = max(1, workers * ranges_per_worker)
+    range_size = -(-total_records // n_ranges)
+    range_size = -(-range_size // batch_size) * batch_size
+    bounds = [(lo, min(lo + range_size, total_records), batch_size)
+              for lo in range(0, total_records, range_size)]
+    # workers=1 still runs in a pool, so it is measured like the other counts
+    # and not in a parent whose heap earlier work has grown.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_stats(pool.map(_run_range, *zip(*bounds)))
+
+
+# ---------- Checkpointed, resumable runner ----------
+
+def save_checkpoint(path, offset, stats, batch_size):
+    """Atomically persist progress: write a temp file, fsync, then rename."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"offset": offset, "batch_size": batch_size, "stats": stats}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
 
-        # Stage 3 – Aggregate revenue by category
-        aggregated = stage_aggregate(
-            aggregated, batch, lambda r: r["category"], lambda r: r["revenue"]
+def load_checkpoint(path, batch_size):
+    """Return (offset, stats) from *path*, or (0, fresh stats) if there is none."""
+    if not os.path.exists(path):
+        return 0, _empty_stats()
+    with open(path) as f:
+        state = json.load(f)
+    if state["batch_size"] != batch_size:
+        raise ValueError(
+            f"Checkpoint was written with batch_size={state['batch_size']}, not {batch_size}"
         )
+    return state["offset"], state["stats"]
 
-        batches_processed += 1
 
-    return {
-        "aggregated": aggregated,
-        "batches_processed": batches_processed,
-        "total_input": total_input,
-        "total_after_filter": total_after_filter,
-        "total_after_map": total_after_map,
-    }
+def run_pipeline_checkpointed(records, batch_size, checkpoint_path, every=10):
+    """run_pipeline that persists progress every *every* batches and resumes from it.
+
+    The checkpoint holds the input offset just past the last completed
+    batch plus the partial aggregate, so a restarted job skips the work it
+    already covered.  It is removed once the job finishes.
+
+    Only a list is skipped without cost.  An iterator, e.g. ``read_jsonl``,
+    is advanced past the offset with islice, so a resume still reads and
+    parses every completed record; it only saves the processing.
+    """
+    offset, stats = load_checkpoint(checkpoint_path, batch_size)
+    if isinstance(records, list):
+        remaining = records[offset:]
+    else:
+        remaining = islice(records, offset, None)
+    since_checkpoint = 0
+    for batch in iter_batches(remaining, batch_size):
+        process_batch(batch, stats["aggregated"], stats)
+        offset += len(batch)
+        since_checkpoint += 1
+        if since_checkpoint == every:
+            save_checkpoint(checkpoint_path, offset, stats, batch_size)
+            since_checkpoint = 0
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
+
+
+# ---------- Adaptive batch sizing ----------
+
+class AdaptiveBatchSizer:
+    """AIMD controller for the batch size.
+
+    With a *target_latency* (seconds) the size grows by *step* while a batch
+    finishes within the target and is halved when it overshoots, so it
+    settles just under the target.  Without one it hill-climbs on
+    throughput: it keeps adding *step* while records/sec holds up against
+    the previous size, and backs off only when the current size is more
+    than *tolerance* slower than the previous one.  It backs off to the
+    best size seen so far (``best`` keeps that throughput and size) and
+    climbs again from there, so it circles the optimum instead of halving
+    past it.  A confirmed drop at the best size itself means the best
+    figure is stale, so it is replaced and the size kept.  A slow batch is
+    re-measured at the same size and judged by the better of the two runs,
+    so one noisy batch does not trigger any of this.
+    """
+
+    def __init__(self, initial=500, min_size=100, max_size=100_000, step=500,
+                 target_latency=None, decrease=0.5, tolerance=0.1):
+        self.size = initial
+        self.min_size = min_size
+        self.max_size = max_size
+        self.step = step
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.history = []  # (batch size, latency, records/sec)
+        self.best = (0.0, initial)  # (records/sec, batch size)
+        self._reference = None  # throughput at the previous accepted size
+        self._slow = None        # throughput of a slow batch awaiting re-measurement
+
+    def observe(self, batch_len, latency):
+        throughput = batch_len / latency if latency > 0 else float("inf")
+        self.history.append((batch_len, latency, throughput))
+        if throughput > self.best[0]:
+            self.best = (throughput, batch_len)
+        if self.target_latency is not None:
+            grow = latency <= self.target_latency
+        else:
+            if self._slow is not None:
+                throughput = max(throughput, self._slow)
+            reference = self._reference
+            grow = reference is None or throughput >= reference * (1 - self.tolerance)
+            if not grow and self._slow is None:
+                self._slow = throughput  # re-measure this size once before giving up on it
+                return
+            self._slow = None
+            self._reference = throughput
+            if not grow:
+                if self.best[1] < self.size:
+                    self.size = self.best[1]
+                    self._reference = None  # climb again from the best size
+                else:
+                    self.best = (throughput, self.size)
+                return
+        if grow:
+            self.size = min(self.max_size, self.size + self.step)
+        else:
+            self.size = max(self.min_size, int(self.size * self.decrease))
+
+    def converged_throughput(self, last=10):
+        recent = self.history[-last:]
+        records = sum(n for n, _, _ in recent)
+        seconds = sum(t for _, t, _ in recent)
+        return records / seconds if seconds else 0.0
+
+
+def run_pipeline_adaptive(records, sizer, batch_overhead=0.0):
+    """run_pipeline with the batch size chosen per batch by *sizer*.
+
+    *batch_overhead* simulates a fixed per-batch cost such as a commit
+    round-trip to the destination.  The short batch at the end of the input
+    says nothing about the size that was asked for, so *sizer* never sees it.
+    """
+    stats = _empty_stats()
+    it = iter(records)
+    while batch := list(islice(it, size := sizer.size)):
+        start = time.perf_counter()
+        process_batch(batch, stats["aggregated"], stats)
+        if batch_overhead:
+            time.sleep(batch_overhead)
+        if len(batch) == size:
+            sizer.observe(len(batch), time.perf_counter() - start)
+    return stats
+
+
+# ---------- Lazy query plan ----------
+
+class LazyQuery:
+    """Deferred plan: ``scan(n).filter(...).map(...).group_by(key).sum(col)``.
+
+    Nothing runs until ``sum``.  Filters that precede every map only read
+    source fields, so they are pushed down into generate_record_range.  The
+    remaining operators are fused into one generated per-batch function, so
+    each batch is traversed once with no intermediate lists; maps write
+    their column into the record in place instead of copying it, and a
+    final map feeding the summed column is inlined into the accumulation.
+    """
+
+    def __init__(self, total_records, batch_size, ops=()):
+        self.total_records = total_records
+        self.batch_size = batch_size
+        self.ops = tuple(ops)
+
+    def filter(self, predicate):
+        return LazyQuery(self.total_records, self.batch_size, self.ops + (("filter", predicate),))
+
+    def map(self, column, fn):
+        """Add (or replace) *column* with ``fn(record)``."""
+        return LazyQuery(self.total_records, self.batch_size, self.ops + (("map", column, fn),))
+
+    def group_by(self, key):
+        return _GroupBy(self, key)
+
+    def _split_pushdown(self):
+        pushed = []
+        for i, op in enumerate(self.ops):
+            if op[0] != "filter":
+                return pushed, list(self.ops[i:])
+            pushed.append(op[1])
+        return pushed, []
+
+    def explain(self, key="?", column="?"):
+        pushed, rest = self._split_pushdown()
+        lines = [f"Scan(records={self.total_records:,}, batch_size={self.batch_size:,}"
+                 f", pushed_filters={len(pushed)})"]
+        fused = [op[0] if op[0] == "filter" else f"map({op[1]})" for op in rest]
+        lines.append(f"  -> Fused[{', '.join(fused + [f'sum({column}) by {key}'])}]")
+        return "\n".join(lines)
+
+
+class _GroupBy:
+    def __init__(self, query, key):
+        self.query = query
+        self.key = key
+
+    def _compile(self, ops, column):
+        """Generate one function that runs every remaining operator per record."""
+        env = {}
+        body = ["def fused(batch, acc):", "    get = acc.get", "    n = 0", "    for r in batch:"]
+        inline = ops and ops[-1][0] == "map" and ops[-1][1] == column
+        for i, op in enumerate(ops):
+            env[f"f{i}"] = op[-1]
+            if op[0] == "filter":
+                body.append(f"        if not f{i}(r): continue")
+            elif not (inline and i == len(ops) - 1):
+                body.append(f"        r[{op[1]!r}] = f{i}(r)")
+        value = f"f{len(ops) - 1}(r)" if inline else f"r[{column!r}]"
+        body += [f"        k = r[{self.key!r}]",
+                 f"        acc[k] = get(k, 0.0) + {value}",
+                 "        n += 1",
+                 "    return n"]
+        exec("\n".join(body), env)
+        return env["fused"]
+
+    def sum(self, column):
+        """Execute the plan; returns the same stats shape as run_pipeline."""
+        q = self.query
+        pushed, rest = q._split_pushdown()
+        where = (lambda r: all(p(r) for p in pushed)) if len(pushed) > 1 else (
+            pushed[0] if pushed else None)
+        fused = self._compile(rest, column)
+        stats = _empty_stats()
+        for lo in range(0, q.total_records, q.batch_size):
+            hi = min(lo + q.batch_size, q.total_records)
+            batch = generate_record_range(lo, hi, where=where)
+            stats["total_input"] += hi - lo
+            stats["total_after_filter"] += len(batch)
+            stats["total_after_map"] += fused(batch, stats["aggregated"])
+            stats["batches_processed"] += 1
+        return stats
+
+
+def scan(total_records, batch_size=10_000):
+    """Start a lazy plan over *total_records* generated records."""
+    return LazyQuery(total_records, batch_size)
+
+
+# ---------- Spill-to-disk aggregation ----------
+
+class SpillingAggregator:
+    """Hash-partitioned sum aggregator that spills to disk past a key budget.
+
+    Partial sums accumulate in a dict.  Once it holds more than *max_keys*
+    distinct keys, its entries are hash-partitioned and appended to one
+    run file per partition, and the dict starts again empty.  ``items()``
+    then merges each partition on its own, so only about
+    ``distinct_keys / partitions`` keys are in memory at a time; a
+    partition that is still too large is re-partitioned recursively.
+
+    It supports the ``get`` / item assignment pattern used by
+    stage_aggregate: after a spill ``get`` returns 0.0 for spilled keys and
+    the new partial sum is added to the spilled ones on merge.
+    """
+
+    def __init__(self, max_keys=1_000_000, partitions=64, directory=None):
+        if not 1 < partitions <= 64:
+            raise ValueError("partitions must be between 2 and 64")
+        self.max_keys = max_keys
+        self.partitions = partitions
+        self.spills = 0
+        self._data = {}
+        self._tmp = tempfile.TemporaryDirectory(dir=directory)
+        self._runs = [os.path.join(self._tmp.name, f"part-{i:03d}.run") for i in range(partitions)]
+
+    def get(self, key, default=0.0):
+        return self._data.get(key, default)
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        if len(self._data) > self.max_keys:
+            self._spill(self._data, self._runs, level=0)
+            self._data = {}
+            self.spills += 1
+
+    _MAX_LEVEL = 9  # 6 bits of the mixed hash per level, so partitions <= 64
+
+    @staticmethod
+    def _mix(key):
+        """splitmix64 finaliser over hash(key), so every bit slice is well mixed."""
+        z = (hash(key) + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return z ^ (z >> 31)
+
+    def _spill(self, data, runs, level):
+        # Each level uses a different slice of the hash; reusing one would
+        # send every key of a partition to the same sub-partition.
+        parts = [[] for _ in runs]
+        shift, n = 6 * level, len(runs)
+        for item in data.items():
+            parts[(self._mix(item[0]) >> shift) % n].append(item)
+        for path, part in zip(runs, parts):
+            if part:
+                with open(path, "ab") as f:
+                    pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    yield from pickle.load(f)
+                except EOFError:
+                    return
+
+    def _merge(self, path, level):
+        merged = {}
+        overflow = None
+        for key, value in self._read_run(path):
+            merged[key] = merged.get(key, 0.0) + value
+            if len(merged) > self.max_keys and level < self._MAX_LEVEL:
+                # Too many keys even for one partition: split it again.
+                if overflow is None:
+                    overflow = [f"{path}.{level + 1}-{i:03d}" for i in range(self.partitions)]
+                self._spill(merged, overflow, level + 1)
+                merged = {}
+        os.remove(path)
+        if overflow is None:
+            yield from merged.items()
+            return
+        self._spill(merged, overflow, level + 1)
+        for sub in overflow:
+            if os.path.exists(sub):
+                yield from self._merge(sub, level + 1)
+
+    def items(self):
+        """Yield (key, total) for every key; consumes the aggregator."""
+        if not self.spills:
+            yield from self._data.items()
+        else:
+            self._spill(self._data, self._runs, level=0)
+            self._data = {}
+            for path in self._runs:
+                if os.path.exists(path):
+                    yield from self._merge(path, level=0)
+        self._tmp.cleanup()
+
+
+# ---------- Columnar batches ----------
+
+class ColumnarBatch:
+    """Records stored column by column in typed ``array`` buffers.
+
+    Category and region are dictionary-encoded as small integer codes into
+    CATEGORIES / REGIONS, so a batch holds no per-record Python objects.
+    Because every column exposes the buffer protocol, ``numpy`` can wrap
+    them without copying.
+    """
+
+    def __init__(self, columns=None):
+        self.columns = columns or {
+            "id": array("q"),
+            "category": array("B"),
+            "region": array("B"),
+            "amount": array("d"),
+            "quantity": array("l"),
+            "returned": array("b"),
+        }
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def append(self, record_id, category, region, amount, quantity, returned):
+        cols = self.columns
+        cols["id"].append(record_id)
+        cols["category"].append(category)
+        cols["region"].append(region)
+        cols["amount"].append(amount)
+        cols["quantity"].append(quantity)
+        cols["returned"].append(returned)
+
+    def slice(self, start, stop):
+        return ColumnarBatch({name: col[start:stop] for name, col in self.columns.items()})
+
+    def as_numpy(self):
+        """Zero-copy numpy views of every column (requires numpy)."""
+        return {name: np.frombuffer(col, dtype=col.typecode) for name, col in self.columns.items()}
+
+
+def columnar_filter(batch, mask):
+    """Filter stage: keep the rows where *mask* is truthy, column by column."""
+    return ColumnarBatch({
+        name: array(col.typecode, compress(col, mask)) for name, col in batch.columns.items()
+    })
+
+
+def columnar_revenue(batch):
+    """Map stage: revenue = amount * quantity as one column operation."""
+    return array("d", [round(a * q, 2) for a, q in
+                       zip(batch.columns["amount"], batch.columns["quantity"])])
+
+
+def columnar_aggregate(accumulator, codes, values, labels):
+    """Aggregate stage: grouped sum of *values* by dictionary code."""
+    sums = [0.0] * len(labels)
+    for code, value in zip(codes, values):
+        sums[code] += value
+    for label, total in zip(labels, sums):
+        if total:
+            accumulator[label] = accumulator.get(label, 0.0) + total
+    return accumulator
+
+
+def run_pipeline_columnar(batch, batch_size, use_numpy=None):
+    """Columnar equivalent of run_pipeline over a ColumnarBatch."""
+    use_numpy = np is not None if use_numpy is None else use_numpy
+    stats = _empty_stats()
+    aggregated = stats["aggregated"]
+    for start in range(0, len(batch), batch_size):
+        chunk = batch.slice(start, start + batch_size)
+        stats["total_input"] += len(chunk)
+        stats["batches_processed"] += 1
+        if use_numpy:
+            cols = chunk.as_numpy()
+            keep = cols["returned"] == 0
+            revenue = np.round(cols["amount"][keep] * cols["quantity"][keep], 2)
+            sums = np.bincount(cols["category"][keep], weights=revenue,
+                               minlength=len(CATEGORIES))
+            for label, total in zip(CATEGORIES, sums.tolist()):
+                if total:
+                    aggregated[label] = aggregated.get(label, 0.0) + total
+            kept = int(keep.sum())
+        else:
+            chunk = columnar_filter(chunk, [not r for r in chunk.columns["returned"]])
+            revenue = columnar_revenue(chunk)
+            columnar_aggregate(aggregated, chunk.columns["category"], revenue, CATEGORIES)
+            kept = len(chunk)
+        stats["total_after_filter"] += kept
+        stats["total_after_map"] += kept
+    return stats
+
+
+# ---------- Benchmarks ----------
+
+def benchmark_columnar(total_records, batch_size):
+    """Compare dict records with columnar batches: records/sec and peak memory."""
+    print("=" * 60)
+    print(f"Dict records vs columnar batches  ({total_records:,} records)")
+    print("=" * 60)
+    variants = [
+        ("dict records", lambda: generate_records(total_records), run_pipeline),
+        ("columnar (array)", lambda: generate_records(total_records, columnar=True),
+         lambda b, size: run_pipeline_columnar(b, size, use_numpy=False)),
+    ]
+    if np is not None:
+        variants.append(("columnar (numpy)", lambda: generate_records(total_records, columnar=True),
+                         lambda b, size: run_pipeline_columnar(b, size, use_numpy=True)))
+    else:
+        print("  (numpy not installed – skipping the numpy fast path)")
+
+    reference = None
+    for name, generate, run in variants:
+        data = generate()
+        start = time.perf_counter()
+        stats = run(data, batch_size)
+        elapsed = time.perf_counter() - start
+        del data
+
+        tracemalloc.start()
+        run(generate(), batch_size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        reference = reference or stats["aggregated"]
+        same = all(math.isclose(stats["aggregated"][k], v, rel_tol=1e-9)
+                   for k, v in reference.items())
+        print(f"  {name:<17} {total_records / elapsed:>12,.0f} records/s  "
+              f"peak memory {peak / 1e6:7.1f} MB  same totals: {same}")
+    print()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (0 if unknown)."""
+    try:
+        # VmHWM belongs to the current address space, so unlike ru_maxrss it
+        # does not inherit the parent's high-water mark across fork + exec.
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return 0.0
+
+
+def _measure_file_run(path, fmt, batch_size, streaming):
+    """Child process: run the pipeline over one file and report peak RSS."""
+    reader = read_jsonl if fmt == "jsonl" else read_csv
+    start = time.perf_counter()
+    records = reader(path) if streaming else list(reader(path))
+    stats = run_pipeline(records, batch_size)
+    elapsed = time.perf_counter() - start
+    return stats["total_input"], elapsed, peak_rss_mb()
+
+
+def benchmark_streaming(sizes, batch_size):
+    """Peak RSS of streaming vs fully loaded input, per file size."""
+    print("=" * 60)
+    print("Streaming file sources  (peak RSS vs input size)")
+    print("=" * 60)
+    # A fresh interpreter per run so each peak RSS reflects only that run.
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for total in sizes:
+            for fmt, writer in [("jsonl", write_jsonl), ("csv", write_csv)]:
+                path = os.path.join(tmp, f"sales_{total}.{fmt}")
+                writer(path, total)
+                size_mb = os.path.getsize(path) / 1e6
+                for streaming in (True, False):
+                    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                        n, elapsed, rss = pool.submit(
+                            _measure_file_run, path, fmt, batch_size, streaming
+                        ).result()
+                    mode = "streamed" if streaming else "loaded  "
+                    print(f"  {fmt:<5} {size_mb:7.1f} MB  {mode}  {n:>9,} records  "
+                          f"{n / elapsed:>10,.0f} records/s  peak RSS {rss:7.1f} MB")
+                os.remove(path)
+    print()
+
+
+def benchmark_spilling(total_records, batch_size, max_keys):
+    """Group revenue by record id (one key per record): in-memory dict vs spilling."""
+    print("=" * 60)
+    print(f"High-cardinality group-by  ({total_records:,} records keyed by id, "
+          f"budget {max_keys:,} keys in memory)")
+    print("=" * 60)
+    by_id = lambda r: r["id"]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    expected = run_pipeline(stream_records(total_records), batch_size, key_fn=by_id)["aggregated"]
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  in-memory dict  {elapsed:6.2f}s  peak memory {peak / 1e6:6.1f} MB  "
+          f"groups={len(expected):,}")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    agg = SpillingAggregator(max_keys=max_keys, partitions=16)
+    run_pipeline(stream_records(total_records), batch_size, aggregated=agg, key_fn=by_id)
+    groups = mismatches = 0
+    for key, total in agg.items():  # compared on the fly so nothing is collected
+        groups += 1
+        mismatches += not math.isclose(expected.get(key, math.nan), total, rel_tol=1e-9)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  spilling        {elapsed:6.2f}s  peak memory {peak / 1e6:6.1f} MB  "
+          f"groups={groups:,}  spills={agg.spills}")
+    print(f"  same results as in-memory path: {groups == len(expected) and not mismatches}")
+    print()
+
+
+def _best_of(fn, repeat=3):
+    """Best wall time of *repeat* calls, to damp GC and warm-up noise."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class SimulatedCrash(RuntimeError):
+    pass
+
+
+def _crash_after(records, n):
+    """Yield the first *n* records, then fail the way a dying worker would."""
+    yield from islice(records, n)
+    raise SimulatedCrash(f"worker died after {n:,} records")
+
+
+def benchmark_checkpointing(total_records, batch_size, every):
+    """Checkpoint overhead, and time saved by resuming after a crash."""
+    n_batches = -(-total_records // batch_size)
+    crash_at = int(n_batches * 0.9)
+    print("=" * 60)
+    print(f"Checkpointed batch job  ({n_batches:,} batches, checkpoint every {every})")
+    print("=" * 60)
+    records = generate_records(total_records)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "job.checkpoint.json")
+        plain_s = _best_of(lambda: run_pipeline(records, batch_size))
+        ckpt_s = _best_of(lambda: run_pipeline_checkpointed(records, batch_size, path, every))
+        print(f"  no checkpoints      {total_records / plain_s:>12,.0f} records/s")
+        print(f"  with checkpoints    {total_records / ckpt_s:>12,.0f} records/s  "
+              f"(overhead {100 * (ckpt_s - plain_s) / plain_s:.1f}%)")
+
+        try:
+            # Die halfway through batch crash_at, past the last checkpoint.
+            died_at = (crash_at - 1) * batch_size + batch_size // 2
+            run_pipeline_checkpointed(_crash_after(records, died_at), batch_size, path, every)
+        except SimulatedCrash as exc:
+            offset, _ = load_checkpoint(path, batch_size)
+            print(f"  {exc}; checkpoint offset {offset:,}")
+        start = time.perf_counter()
+        resumed = run_pipeline_checkpointed(records, batch_size, path, every)
+        resume_s = time.perf_counter() - start
+    same = all(math.isclose(resumed["aggregated"][k], v, rel_tol=1e-9)
+               for k, v in run_pipeline(records, batch_size)["aggregated"].items())
+    print(f"  resume took {resume_s:.3f}s vs {ckpt_s:.3f}s for a full rerun "
+          f"(saved {ckpt_s - resume_s:.3f}s)  "
+          f"batches={resumed['batches_processed']:,}  same totals: {same}")
+    print()
+
+
+def benchmark_adaptive(total_records, batch_overhead=0.002, passes=5):
+    """Let the AIMD controller pick batch sizes instead of hard-coding them.
+
+    The records are fed *passes* times over, so the controller sees enough
+    batches to settle and the last ten show the size it settled on.
+    """
+    print("=" * 60)
+    print(f"Adaptive batch sizing  ({total_records:,} records x {passes} passes, "
+          f"{batch_overhead * 1000:.0f} ms fixed cost per batch)")
+    print("=" * 60)
+    records = generate_records(total_records)
+    for label, sizer in [
+        ("target latency 20 ms", AdaptiveBatchSizer(initial=100, step=1_000, target_latency=0.020)),
+        ("max throughput", AdaptiveBatchSizer(initial=100, step=1_000, max_size=20_000)),
+    ]:
+        stream = (r for _ in range(passes) for r in records)
+        stats = run_pipeline_adaptive(stream, sizer, batch_overhead)
+        sizes = [n for n, _, _ in sizer.history]
+        shown = sizes if len(sizes) <= 16 else [*sizes[:6], "...", *sizes[-10:]]
+        trace = " ".join(str(n) for n in shown)
+        recent = sizes[-10:]
+        print(f"  {label}: {stats['batches_processed']} batches, final size {sizer.size:,}")
+        print(f"    sizes: {trace}")
+        print(f"    converged: size {min(recent):,}-{max(recent):,}, "
+              f"{sizer.converged_throughput():,.0f} records/s over the last {len(recent)} batches")
+        print(f"    fastest single batch: {sizer.best[0]:,.0f} records/s at size {sizer.best[1]:,}")
+    print()
+
+
+def benchmark_lazy_plan(total_records, batch_size):
+    """Staged run_pipeline vs the fused, pushed-down lazy plan."""
+    print("=" * 60)
+    print(f"Staged pipeline vs lazy fused plan  ({total_records:,} records)")
+    print("=" * 60)
+    plan = (
+        scan(total_records, batch_size)
+        .filter(lambda r: not r["returned"])
+        .map("revenue", lambda r: round(r["amount"] * r["quantity"], 2))
+        .group_by("category")
+    )
+    print("  " + plan.query.explain("category", "revenue").replace("\n", "\n  "))
+    start = time.perf_counter()
+    staged = run_pipeline(stream_records(total_records, batch_size), batch_size)
+    staged_s = time.perf_counter() - start
+    start = time.perf_counter()
+    lazy = plan.sum("revenue")
+    lazy_s = time.perf_counter() - start
+    same = all(math.isclose(lazy["aggregated"][k], v, rel_tol=1e-9)
+               for k, v in staged["aggregated"].items())
+    print(f"  generate + process, staged       {total_records / staged_s:>12,.0f} records/s")
+    print(f"  generate + process, lazy plan    {total_records / lazy_s:>12,.0f} records/s  "
+          f"x{staged_s / lazy_s:.2f}  same totals: {same}")
+
+    # Record generation dominates the figures above; time the stages alone.
+    batches = [generate_record_range(lo, min(lo + batch_size, total_records))
+               for lo in range(0, total_records, batch_size)]
+    records = [r for b in batches for r in b]
+    pushed, rest = plan.query._split_pushdown()
+    fused = plan._compile(rest, "revenue")
+
+    def run_fused():
+        acc = {}
+        for batch in batches:
+            fused([r for r in batch if pushed[0](r)], acc)
+
+    staged_s = _best_of(lambda: run_pipeline(records, batch_size))
+    lazy_s = _best_of(run_fused)
+    print(f"  process only, staged             {total_records / staged_s:>12,.0f} records/s")
+    print(f"  process only, fused              {total_records / lazy_s:>12,.0f} records/s  "
+          f"x{staged_s / lazy_s:.2f}")
+    print()
+
+
+def benchmark_parallel(total_records, batch_size, max_workers=None):
+    """Compare 1..N worker processes; pass total_records=10_000_000 for the full run.
+
+    Worker counts above the CPU count are skipped: they only time-slice.
+    """
+    cpus = os.cpu_count() or 1
+    max_workers = min(max_workers or cpus, cpus)
+    print("=" * 60)
+    print(f"Parallel map-reduce mode  ({total_records:,} records, "
+          f"{cpus} CPUs available)")
+    print("=" * 60)
+    counts = sorted({1, 2, max_workers // 2 or 1, max_workers} & set(range(1, max_workers + 1)))
+    if max_workers == 1:
+        print("  only one CPU: measuring the one-worker pool, no speedup to show")
+    baseline = None
+    reference = None
+    for workers in counts:
+        start = time.perf_counter()
+        stats = run_pipeline_parallel(total_records, batch_size, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        reference = reference or stats["aggregated"]
+        same = all(
+            math.isclose(stats["aggregated"][k], v, rel_tol=1e-9) for k, v in reference.items()
+        )
+        print(f"  workers={workers:<3} {elapsed:7.2f}s  "
+              f"{total_records / elapsed:>12,.0f} records/s  "
+              f"speedup x{baseline / elapsed:.2f}  "
+              f"same totals: {same}")
+    print()
 
 
 # ---------- Main ----------
 
 def main():
+    ap = argparse.ArgumentParser(description="Batch processing pipeline demo.")
+    ap.add_argument("--bench", action="store_true",
+                    help="Also run the benchmarks (checkpointing, adaptive sizing, columnar, "
+                         "streaming, spilling, lazy plan, parallel).")
+    args = ap.parse_args()
     total_records = 10_000
 
     print("=" * 60)
@@ -141,6 +1038,32 @@ def main():
             print(f"    {category:<15} ${revenue:>12,.2f}")
         print()
 
+    if args.bench:
+        # --- Checkpoint / resume ---
+        benchmark_checkpointing(total_records=200_000, batch_size=200, every=10)
+
+        # --- Adaptive batch sizes ---
+        benchmark_adaptive(total_records=200_000)
+
+        # --- Columnar batches ---
+        benchmark_columnar(total_records=200_000, batch_size=10_000)
+
+        # --- Streaming file sources ---
+        benchmark_streaming(sizes=[50_000, 200_000], batch_size=5_000)
+
+        # --- High-cardinality aggregation ---
+        benchmark_spilling(total_records=150_000, batch_size=10_000, max_keys=10_000)
+
+        # --- Lazy, fused query plan ---
+        benchmark_lazy_plan(total_records=300_000, batch_size=10_000)
+
+        # --- Parallel map-reduce mode ---
+        benchmark_parallel(total_records=500_000, batch_size=10_000)
+    else:
+        print("  (run with --bench for the checkpointing, adaptive, columnar, streaming,")
+        print("   spilling, lazy-plan and parallel benchmarks)")
+        print()
+
     # --- Show why batching matters ---
     print("=" * 60)
     print("Why batch processing?")
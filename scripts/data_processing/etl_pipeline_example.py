@@ -11,12 +11,27 @@ Also demonstrates incremental extraction via a watermark (last_seen_id).
 No external dependencies required.
 
 Usage:
-    python etl_pipeline_example.py
+    python etl_pipeline_example.py          # quick demo
+    python etl_pipeline_example.py --bench  # also run the benchmarks (~40 s)
 """
 
+import argparse
+import gc
+import json
+import math
+import os
+import queue
 import random
+import sqlite3
+import tempfile
+import threading
 import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from operator import itemgetter
+from types import MappingProxyType
 
 
 # ---------------------------------------------------------------------------
@@ -46,15 +61,75 @@ def _make_record(record_id: int, seed: int) -> dict:
 
 
 class SourceDatabase:
-    """In-memory simulated source that supports incremental reads via a record_id watermark."""
+    """In-memory simulated source that supports incremental reads via a record_id watermark.
+
+    Records are kept in id order alongside a sorted ``_ids`` index, so a
+    read is a binary search for the watermark followed by at most *limit*
+    row visits, rather than a scan of the whole table.
+
+    Every write is also appended to a change log of
+    ``(seq, committed_at, op, row)`` entries, where ``seq`` starts at 1 and
+    has no gaps, for change-data-capture consumers.  Rows are replaced
+    rather than mutated on update, so log entries can share them safely,
+    and each row image carries the seq of the change that wrote it in
+    ``_seq``, a version that only ever grows.
+    """
 
     def __init__(self, total_records: int = 200):
         random.seed(0)
-        self._records = [_make_record(i, seed=i * 7) for i in range(1, total_records + 1)]
+        self._records = [{**_make_record(i, seed=i * 7), "_seq": i}
+                         for i in range(1, total_records + 1)]
+        self._ids = [r["id"] for r in self._records]
+        self._lock = threading.Lock()
+        now = time.perf_counter()
+        self._log = [(seq, now, "insert", r) for seq, r in enumerate(self._records, start=1)]
+
+    def insert(self, record: dict) -> None:
+        with self._lock:
+            record = {**record, "_seq": len(self._log) + 1}
+            if not self._ids or record["id"] > self._ids[-1]:
+                self._ids.append(record["id"])
+                self._records.append(record)
+            else:
+                idx = bisect_left(self._ids, record["id"])
+                if idx < len(self._ids) and self._ids[idx] == record["id"]:
+                    raise KeyError(f"Duplicate id {record['id']}")
+                self._ids.insert(idx, record["id"])
+                self._records.insert(idx, record)
+            self._log.append((len(self._log) + 1, time.perf_counter(), "insert", record))
+
+    def update(self, record_id: int, **changes) -> None:
+        with self._lock:
+            idx = bisect_left(self._ids, record_id)
+            if idx == len(self._ids) or self._ids[idx] != record_id:
+                raise KeyError(record_id)
+            row = {**self._records[idx], **changes, "_seq": len(self._log) + 1}
+            self._records[idx] = row
+            self._log.append((len(self._log) + 1, time.perf_counter(), "update", row))
+
+    def read_changes(self, after_seq: int, limit: int = 50) -> list[tuple]:
+        """Return up to *limit* change-log entries with seq > after_seq."""
+        return self._log[after_seq:after_seq + limit]
 
-    def read_incremental(self, after_id: int, limit: int = 50) -> list[dict]:
-        """Return up to *limit* records with id > after_id."""
-        return [deepcopy(r) for r in self._records if r["id"] > after_id][:limit]
+    @property
+    def last_seq(self) -> int:
+        return len(self._log)
+
+    def _iter_after(self, after_id: int, limit: int):
+        """Yield records with id > after_id in id order, stopping after *limit*."""
+        start = bisect_right(self._ids, after_id)
+        for i in range(start, min(start + limit, len(self._records))):
+            yield self._records[i]
+
+    def read_incremental(self, after_id: int, limit: int = 50, copy: bool = True) -> list:
+        """Return up to *limit* records with id > after_id.
+
+        With ``copy=False`` the rows are read-only ``MappingProxyType`` views
+        of the stored records instead of deep copies.
+        """
+        if copy:
+            return [deepcopy(r) for r in self._iter_after(after_id, limit)]
+        return [MappingProxyType(r) for r in self._iter_after(after_id, limit)]
 
 
 # ---------------------------------------------------------------------------
@@ -64,12 +139,18 @@ class SourceDatabase:
 class Extractor:
     """Reads records from the source using an incremental watermark."""
 
-    def __init__(self, source: SourceDatabase):
+    def __init__(self, source: SourceDatabase, copy: bool = True):
         self._source = source
+        self._copy = copy
         self._watermark = 0  # last successfully processed id
 
-    def extract_batch(self, batch_size: int = 50) -> list[dict]:
-        records = self._source.read_incremental(after_id=self._watermark, limit=batch_size)
+    def extract_batch(self, batch_size: int = 50, after_id: int | None = None) -> list[dict]:
+        """Read the next batch after the watermark, or after *after_id* when reading ahead."""
+        records = self._source.read_incremental(
+            after_id=self._watermark if after_id is None else after_id,
+            limit=batch_size,
+            copy=self._copy,
+        )
         return records
 
     def advance_watermark(self, records: list[dict]) -> None:
@@ -81,6 +162,43 @@ class Extractor:
         return self._watermark
 
 
+class CDCExtractor:
+    """Tails the source change log from a stored offset (change data capture).
+
+    Unlike the id watermark, the log also carries updates to rows that were
+    already extracted, and reading it costs O(batch) however large the
+    source grows.  Several changes to one key within a batch collapse into
+    its latest row image.  The offset only moves in ``advance_watermark``,
+    i.e. after the batch was loaded, so it has the same interface as
+    Extractor and drops into run_full_etl.
+    """
+
+    def __init__(self, source: SourceDatabase, offset: int = 0):
+        self._source = source
+        self._offset = offset
+        self._pending = offset
+        self.collapsed = 0
+        self.pending_timestamps: list[float] = []  # commit times in the last batch
+
+    def extract_batch(self, batch_size: int = 50) -> list:
+        changes = self._source.read_changes(self._offset, limit=batch_size)
+        latest: dict[int, dict] = {}
+        for _, _, _, row in changes:
+            latest.pop(row["id"], None)  # re-insert so order follows the last change
+            latest[row["id"]] = row
+        self.collapsed += len(changes) - len(latest)
+        self.pending_timestamps = [ts for _, ts, _, _ in changes]
+        self._pending = changes[-1][0] if changes else self._offset
+        return [MappingProxyType(row) for row in latest.values()]
+
+    def advance_watermark(self, records: list) -> None:
+        self._offset = self._pending
+
+    @property
+    def watermark(self) -> int:
+        return self._offset
+
+
 # ---------------------------------------------------------------------------
 # Transform phase
 # ---------------------------------------------------------------------------
@@ -129,7 +247,9 @@ def transform(records: list[dict]) -> TransformResult:
     seen_ids: set[int] = set()
 
     for raw in records:
-        record = deepcopy(raw)
+        # Records are flat, so a shallow copy is a full copy; it also turns a
+        # read-only view from the source into a mutable dict.
+        record = dict(raw)
 
         # --- Deduplication ---
         if record["id"] in seen_ids:
@@ -168,85 +288,620 @@ def transform(records: list[dict]) -> TransformResult:
     return result
 
 
+# Declarative equivalent of transform(): compile_transform() turns it into a
+# single generated function that builds each output record once.
+TRANSFORM_SPEC = {
+    "dedupe_on": "id",
+    "passthrough": ["id", "customer", "quantity", "returned", "_seq"],
+    # field -> (parser, default applied when the parsed value is falsy)
+    "fields": {
+        "amount": (_parse_amount, None),
+        "currency": (_clean_string, "usd"),
+        "category": (_clean_string, "unknown"),
+        "region": (_clean_string, "unknown"),
+    },
+    # (quarantine reason, predicate that must hold), checked in order
+    "validators": [
+        ("invalid_amount", lambda r: r["amount"] is not None and r["amount"] > 0),
+        ("missing_customer", lambda r: r.get("customer") is not None),
+        ("returned_item", lambda r: not r.get("returned")),
+    ],
+    "enrich": {"revenue": lambda r: round(r["amount"] * r.get("quantity", 1), 2)},
+    "drop": ["returned"],
+}
+
+
+def compile_transform(spec: dict):
+    """Compile a rule spec into one per-record function with transform()'s contract.
+
+    The output records differ from transform()'s in one way: they hold
+    only the spec's fields, so source fields the spec does not name are
+    dropped where transform() would keep them.  Passthrough fields missing
+    from a source record stay missing, as they do in transform().
+    """
+    env = {"TransformResult": TransformResult}
+    lines = [
+        "def compiled_transform(records):",
+        "    result = TransformResult()",
+        "    clean, quarantined = result.clean, result.quarantined",
+        "    seen = set()",
+        "    for raw in records:",
+        f"        key = raw[{spec['dedupe_on']!r}]",
+        "        if key in seen:",
+        "            continue",
+        "        seen.add(key)",
+    ]
+    items = [f"{spec['dedupe_on']!r}: key"]
+    for i, (name, (parser, default)) in enumerate(spec["fields"].items()):
+        env[f"parse{i}"] = parser
+        fallback = f" or {default!r}" if default is not None else ""
+        items.append(f"{name!r}: parse{i}(raw.get({name!r})){fallback}")
+    lines.append(f"        rec = {{{', '.join(items)}}}")
+    for name in spec["passthrough"]:
+        if name != spec["dedupe_on"]:
+            lines += [f"        if {name!r} in raw:",
+                      f"            rec[{name!r}] = raw[{name!r}]"]
+    for i, (reason, check) in enumerate(spec["validators"]):
+        env[f"check{i}"] = check
+        lines += [
+            f"        if not check{i}(rec):",
+            f"            rec['_quarantine_reason'] = {reason!r}",
+            "            quarantined.append(rec)",
+            "            continue",
+        ]
+    for i, (name, fn) in enumerate(spec["enrich"].items()):
+        env[f"enrich{i}"] = fn
+        lines.append(f"        rec[{name!r}] = enrich{i}(rec)")
+    lines += [f"        rec.pop({name!r}, None)" for name in spec["drop"]]
+    lines += ["        clean.append(rec)", "    return result"]
+    exec("\n".join(lines), env)
+    return env["compiled_transform"]
+
+
+compiled_transform = compile_transform(TRANSFORM_SPEC)
+
+
+def _transform_chunk(records: list[dict]) -> TransformResult:
+    return compiled_transform(records)
+
+
+def transform_parallel(records: list, workers: int | None = None,
+                       chunk_size: int = 20_000) -> TransformResult:
+    """Run compiled_transform over chunks in a process pool.
+
+    Duplicates are removed in the parent first so that deduplication still
+    spans the whole batch.  Records are pickled to the workers and results
+    back, so this only pays off when the rules are expensive per record.
+    """
+    seen: set[int] = set()
+    unique = []
+    for r in records:
+        if r["id"] not in seen:
+            seen.add(r["id"])
+            unique.append(dict(r))  # read-only views cannot be pickled
+    chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+    result = TransformResult()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for part in pool.map(_transform_chunk, chunks):
+            result.clean.extend(part.clean)
+            result.quarantined.extend(part.quarantined)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Cross-batch deduplication
+# ---------------------------------------------------------------------------
+
+_MASK64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for *capacity* keys at *error_rate*."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # The filter is rebuilt from the exact store on open, so the
+        # per-process salted hash() is fine; splitmix64 spreads small ints.
+        x = (hash(key) + 0x9E3779B97F4A7C15) & _MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+        h1, h2 = x & 0xFFFFFFFF, (x >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]  # double hashing
+
+    def add(self, key) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+def row_version(record) -> str:
+    """Key a record by id and the source change that wrote it.
+
+    The change seq only grows, so every update gets a new key, even one
+    that puts back an earlier row image, while a replay keeps its key.
+    """
+    return f"{record['id']}:{record['_seq']}"
+
+
+class DedupIndex:
+    """Persistent set of processed row versions that spans batches and restarts.
+
+    The exact set lives in SQLite, on disk, with a capped page cache, so
+    memory stays bounded however many keys are stored.  An optional Bloom
+    filter in front answers "definitely new" without touching SQLite; only
+    keys it reports as possibly seen are confirmed exactly, and the share
+    of those that turn out to be new is the measured false-positive rate.
+
+    Keys default to ``row_version``.  Keying on the id alone would drop
+    every later update to a row, e.g. from ``CDCExtractor``, as a replay.
+    """
+
+    def __init__(self, path: str = ":memory:", key_fn=row_version,
+                 bloom_capacity: int | None = None, bloom_error_rate: float = 0.01,
+                 cache_kb: int = 2048):
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA cache_size=-{cache_kb}")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (key PRIMARY KEY) WITHOUT ROWID")
+        self.key_fn = key_fn
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        if self.bloom is not None:
+            for (key,) in self._conn.execute("SELECT key FROM seen"):
+                self.bloom.add(key)
+        self.lookups = 0
+        self.replayed = 0
+        self.bloom_positives = 0
+        self.false_positives = 0
+
+    def _seen(self, keys: list) -> set:
+        found: set = set()
+        for i in range(0, len(keys), 900):
+            chunk = keys[i:i + 900]
+            found.update(k for (k,) in self._conn.execute(
+                f"SELECT key FROM seen WHERE key IN ({', '.join('?' * len(chunk))})", chunk))
+        return found
+
+    def filter_new(self, records: list) -> tuple[list, int]:
+        """Split off records whose key was already processed; returns (new, replayed)."""
+        keys = [self.key_fn(r) for r in records]
+        self.lookups += len(keys)
+        if self.bloom is None:
+            maybe = keys
+        else:
+            maybe = [k for k in keys if k in self.bloom]
+            self.bloom_positives += len(maybe)
+        seen = self._seen(maybe) if maybe else set()
+        if self.bloom is not None:
+            self.false_positives += len(set(maybe) - seen)
+        new = [r for r, k in zip(records, keys) if k not in seen]
+        self.replayed += len(records) - len(new)
+        return new, len(records) - len(new)
+
+    def add(self, records: list) -> None:
+        """Mark records as processed; call once they are safely loaded."""
+        keys = [(self.key_fn(r),) for r in records]
+        self._conn.execute("BEGIN")
+        self._conn.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)", keys)
+        self._conn.execute("COMMIT")
+        if self.bloom is not None:
+            for (key,) in keys:
+                self.bloom.add(key)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Share of truly new keys that the Bloom filter reported as possibly seen."""
+        negatives = self.lookups - (self.bloom_positives - self.false_positives)
+        return self.false_positives / negatives if negatives else 0.0
+
+    def close(self) -> None:
+        self._conn.close()
+
+
 # ---------------------------------------------------------------------------
 # Load phase (in-memory destination with upsert semantics)
 # ---------------------------------------------------------------------------
 
+class MaterializedView:
+    """A grouped sum kept up to date as rows are inserted, updated or removed."""
+
+    def __init__(self, key_fn, value_fn):
+        self.key_fn = key_fn
+        self.value_fn = value_fn
+        self.totals: dict = {}
+        self.counts: dict = {}
+
+    def apply(self, row: dict, sign: int) -> None:
+        """Add (sign=+1) or retract (sign=-1) one row's contribution."""
+        group = self.key_fn(row)
+        count = self.counts.get(group, 0) + sign
+        if count:
+            self.counts[group] = count
+            self.totals[group] = self.totals.get(group, 0.0) + sign * self.value_fn(row)
+        else:
+            # Last row of the group left: drop it rather than keep float residue.
+            self.counts.pop(group, None)
+            self.totals.pop(group, None)
+
+    def read(self) -> dict:
+        return {group: round(total, 2) for group, total in self.totals.items()}
+
+
 class DestinationStore:
-    """In-memory store that supports upsert by primary key."""
+    """In-memory store that supports upsert by primary key.
+
+    Aggregates are maintained incrementally: ``upsert`` retracts the old
+    row's contribution from every registered view and adds the new one, so
+    reading a view costs O(groups) instead of a scan of all rows.
+    """
 
     def __init__(self):
         self._rows: dict[int, dict] = {}
         self.inserts = 0
         self.updates = 0
+        self._views: dict[str, MaterializedView] = {}
+        self.register_view(
+            "revenue_by_category",
+            key_fn=lambda r: r.get("category", "unknown"),
+            value_fn=lambda r: r.get("revenue", 0.0),
+        )
+
+    def register_view(self, name: str, key_fn, value_fn) -> None:
+        """Maintain sum(value_fn(row)) grouped by key_fn(row); backfills existing rows."""
+        view = MaterializedView(key_fn, value_fn)
+        for row in self._rows.values():
+            view.apply(row, +1)
+        self._views[name] = view
+
+    def view(self, name: str) -> dict:
+        return self._views[name].read()
+
+    def recompute_view(self, name: str) -> dict:
+        """Full rescan of the rows; used to check the incremental result."""
+        view = self._views[name]
+        totals: dict = {}
+        for row in self._rows.values():
+            group = view.key_fn(row)
+            totals[group] = totals.get(group, 0.0) + view.value_fn(row)
+        return {group: round(total, 2) for group, total in totals.items()}
 
     def upsert(self, records: list[dict]) -> None:
+        views = list(self._views.values())
         for record in records:
             key = record["id"]
-            if key in self._rows:
-                self._rows[key] = record
+            old = self._rows.get(key)
+            if old is not None:
+                for view in views:
+                    view.apply(old, -1)
                 self.updates += 1
             else:
-                self._rows[key] = record
                 self.inserts += 1
+            self._rows[key] = record
+            for view in views:
+                view.apply(record, +1)
 
     @property
     def row_count(self) -> int:
         return len(self._rows)
 
     def aggregate_revenue_by_category(self) -> dict[str, float]:
-        totals: dict[str, float] = {}
-        for row in self._rows.values():
-            cat = row.get("category", "unknown")
-            totals[cat] = round(totals.get(cat, 0.0) + row.get("revenue", 0.0), 2)
-        return totals
+        return self.view("revenue_by_category")
+
+
+class SQLiteDestinationStore:
+    """SQLite-backed destination with the same interface as DestinationStore.
+
+    Each ``upsert`` call is one transaction that writes the whole batch with
+    ``executemany`` and ``INSERT ... ON CONFLICT DO UPDATE``.  The database
+    runs in WAL mode with ``synchronous=NORMAL`` and a larger page cache,
+    the usual settings for a write-heavy load path.
+    """
+
+    COLUMNS = ["id", "customer", "category", "region", "amount", "currency", "quantity", "revenue"]
+
+    def __init__(self, path: str = ":memory:", cache_mb: int = 64):
+        # Explicit transactions; the connection may be handed to a loader
+        # thread, but it is only ever used by one thread at a time.
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")  # negative = KiB
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sales ("
+            "id INTEGER PRIMARY KEY, customer TEXT, category TEXT, region TEXT, "
+            "amount REAL, currency TEXT, quantity INTEGER, revenue REAL)"
+        )
+        cols = ", ".join(self.COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.COLUMNS[1:])
+        self._upsert_sql = (
+            f"INSERT INTO sales ({cols}) VALUES ({', '.join('?' * len(self.COLUMNS))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}"
+        )
+        self.inserts = 0
+        self.updates = 0
+
+    def _existing(self, ids: list[int]) -> int:
+        found = 0
+        for i in range(0, len(ids), 900):  # stay under SQLite's bound-parameter limit
+            chunk = ids[i:i + 900]
+            found += self._conn.execute(
+                f"SELECT COUNT(*) FROM sales WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchone()[0]
+        return found
+
+    def upsert(self, records: list[dict]) -> None:
+        if not records:
+            return
+        rows = [tuple(r.get(c) for c in self.COLUMNS) for r in records]
+        self._conn.execute("BEGIN")
+        try:
+            existing = self._existing([row[0] for row in rows])
+            self._conn.executemany(self._upsert_sql, rows)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self.updates += existing
+        self.inserts += len(rows) - existing
+
+    def upsert_row_at_a_time(self, records: list[dict]) -> None:
+        """Baseline: one statement and one commit per row."""
+        for record in records:
+            row = tuple(record.get(c) for c in self.COLUMNS)
+            existed = self._existing([row[0]])
+            self._conn.execute(self._upsert_sql, row)  # autocommits
+            self.updates += existed
+            self.inserts += 1 - existed
+
+    @property
+    def row_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+
+    def aggregate_revenue_by_category(self) -> dict[str, float]:
+        return {
+            cat: round(total, 2)
+            for cat, total in self._conn.execute(
+                "SELECT category, SUM(revenue) FROM sales GROUP BY category"
+            )
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+# Upper bounds, in seconds, of the per-batch latency buckets (+Inf is implied).
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; an observation is one binary search and two adds."""
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket, as Prometheus does."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+_QUARANTINE_REASON = itemgetter("_quarantine_reason")
+
+
+class PhaseMetrics:
+    def __init__(self):
+        self.rows = 0
+        self.seconds = 0.0
+        self.quarantined = 0
+        self.reasons: Counter = Counter()
+        self.latency = LatencyHistogram()
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def quarantine_rate(self) -> float:
+        return self.quarantined / self.rows if self.rows else 0.0
+
+
+class ETLMetrics:
+    """Per-phase throughput, batch latency and quarantine counters.
+
+    Pass an instance to ``run_full_etl(metrics=...)``; the runner calls
+    ``observe`` once per phase per batch, so the cost scales with the
+    number of batches rather than rows.  ``by_reason=True`` also breaks
+    quarantines down by reason, which does touch every quarantined row.
+    """
+
+    def __init__(self, by_reason: bool = False):
+        self.by_reason = by_reason
+        self.phases: dict[str, PhaseMetrics] = {}
+
+    def observe(self, phase: str, seconds: float, rows: int,
+                quarantined: list[dict] | None = None) -> None:
+        metrics = self.phases.get(phase)
+        if metrics is None:
+            metrics = self.phases[phase] = PhaseMetrics()
+        metrics.rows += rows
+        metrics.seconds += seconds
+        metrics.latency.observe(seconds)
+        if quarantined:
+            metrics.quarantined += len(quarantined)
+            if self.by_reason:
+                metrics.reasons.update(map(_QUARANTINE_REASON, quarantined))
+
+    def to_dict(self) -> dict:
+        return {
+            phase: {
+                "rows": m.rows,
+                "seconds": round(m.seconds, 6),
+                "rows_per_sec": round(m.rows_per_sec, 1),
+                "batches": m.latency.count,
+                "latency_p50": round(m.latency.quantile(0.5), 6),
+                "latency_p99": round(m.latency.quantile(0.99), 6),
+                "latency_buckets": dict(zip([*map(str, m.latency.bounds), "+Inf"],
+                                            m.latency.counts)),
+                "quarantine_rate": round(m.quarantine_rate, 4),
+                "quarantined": m.quarantined,
+                "quarantine_reasons": dict(m.reasons),
+            }
+            for phase, m in self.phases.items()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "etl") -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_rows_total Rows processed by each phase.",
+            f"# TYPE {prefix}_rows_total counter",
+        ]
+        lines += [f'{prefix}_rows_total{{phase="{p}"}} {m.rows}' for p, m in self.phases.items()]
+        lines += [
+            f"# HELP {prefix}_quarantined_total Rows quarantined by each phase.",
+            f"# TYPE {prefix}_quarantined_total counter",
+        ]
+        lines += [f'{prefix}_quarantined_total{{phase="{p}"}} {m.quarantined}'
+                  for p, m in self.phases.items()]
+        if self.by_reason:
+            lines += [
+                f"# HELP {prefix}_quarantined_by_reason_total Rows quarantined, by reason.",
+                f"# TYPE {prefix}_quarantined_by_reason_total counter",
+            ]
+            for phase, m in self.phases.items():
+                for reason, n in sorted(m.reasons.items()):
+                    lines.append(f'{prefix}_quarantined_by_reason_total'
+                                 f'{{phase="{phase}",reason="{reason}"}} {n}')
+        lines += [
+            f"# HELP {prefix}_batch_seconds Per-batch latency of each phase.",
+            f"# TYPE {prefix}_batch_seconds histogram",
+        ]
+        for phase, m in self.phases.items():
+            cumulative = 0
+            for bound, n in zip([*map(str, m.latency.bounds), "+Inf"], m.latency.counts):
+                cumulative += n
+                lines.append(f'{prefix}_batch_seconds_bucket{{phase="{phase}",le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f'{prefix}_batch_seconds_sum{{phase="{phase}"}} {m.latency.sum:.6f}')
+            lines.append(f'{prefix}_batch_seconds_count{{phase="{phase}"}} {m.latency.count}')
+        return "\n".join(lines) + "\n"
 
 
 # ---------------------------------------------------------------------------
 # Pipeline runner
 # ---------------------------------------------------------------------------
 
-def run_full_etl(batch_size: int = 50) -> None:
-    source = SourceDatabase(total_records=200)
-    extractor = Extractor(source)
-    destination = DestinationStore()
+def run_full_etl(batch_size: int = 50, source: SourceDatabase | None = None,
+                 copy: bool = True, verbose: bool = True,
+                 transform_fn=transform, destination=None, extractor=None,
+                 dedup_index: DedupIndex | None = None,
+                 metrics: ETLMetrics | None = None) -> DestinationStore:
+    source = source or SourceDatabase(total_records=200)
+    extractor = extractor or Extractor(source, copy=copy)
+    destination = destination if destination is not None else DestinationStore()
 
     total_extracted = 0
     total_clean = 0
     total_quarantined = 0
+    total_replayed = 0
     batch_num = 0
 
-    print("-" * 60)
-    print(f"Starting ETL pipeline  (batch_size={batch_size})")
-    print("-" * 60)
+    if verbose:
+        print("-" * 60)
+        print(f"Starting ETL pipeline  (batch_size={batch_size})")
+        print("-" * 60)
 
     while True:
         # --- Extract ---
+        t0 = time.perf_counter()
         raw_records = extractor.extract_batch(batch_size=batch_size)
         if not raw_records:
             break
+        t1 = time.perf_counter()
 
         batch_num += 1
         total_extracted += len(raw_records)
 
+        # --- Drop records already processed by an earlier batch or run ---
+        fresh = raw_records
+        if dedup_index is not None:
+            fresh, replayed = dedup_index.filter_new(raw_records)
+            total_replayed += replayed
+
         # --- Transform ---
-        result = transform(raw_records)
+        t2 = time.perf_counter()
+        result = transform_fn(fresh)
         total_clean += result.clean_count
         total_quarantined += result.quarantine_count
 
         # --- Load ---
+        t3 = time.perf_counter()
         destination.upsert(result.clean)
+        if dedup_index is not None:
+            # Only loaded rows count as processed, so quarantined rows are
+            # checked again whenever they are delivered again.
+            loaded = {r["id"] for r in result.clean}
+            dedup_index.add([r for r in fresh if r["id"] in loaded])
+
+        if metrics is not None:
+            t4 = time.perf_counter()
+            metrics.observe("extract", t1 - t0, len(raw_records))
+            if dedup_index is not None:
+                metrics.observe("dedup", t2 - t1, len(raw_records))
+            metrics.observe("transform", t3 - t2, len(fresh), result.quarantined)
+            metrics.observe("load", t4 - t3, result.clean_count)
 
         # --- Advance watermark after successful load ---
         extractor.advance_watermark(raw_records)
 
-        print(
-            f"  Batch {batch_num:02d} | "
-            f"extracted={len(raw_records):3d}  "
-            f"clean={result.clean_count:3d}  "
-            f"quarantined={result.quarantine_count:3d}  "
-            f"watermark={extractor.watermark}"
-        )
+        if verbose:
+            print(
+                f"  Batch {batch_num:02d} | "
+                f"extracted={len(raw_records):3d}  "
+                f"clean={result.clean_count:3d}  "
+                f"quarantined={result.quarantine_count:3d}  "
+                f"watermark={extractor.watermark}"
+            )
+
+    if not verbose:
+        return destination
 
     print()
     print("Pipeline complete")
@@ -254,6 +909,8 @@ def run_full_etl(batch_size: int = 50) -> None:
     print(f"  Total extracted   : {total_extracted}")
     print(f"  Total clean loaded: {total_clean}")
     print(f"  Total quarantined : {total_quarantined}")
+    if dedup_index is not None:
+        print(f"  Replays skipped   : {total_replayed}")
     print(f"  Destination rows  : {destination.row_count}")
     print(f"  Inserts           : {destination.inserts}")
     print(f"  Updates           : {destination.updates}")
@@ -261,6 +918,124 @@ def run_full_etl(batch_size: int = 50) -> None:
     print("  Revenue by category:")
     for cat, rev in sorted(destination.aggregate_revenue_by_category().items()):
         print(f"    {cat:<15} ${rev:>10,.2f}")
+    return destination
+
+
+# ---------------------------------------------------------------------------
+# Pipelined runner (extract, transform and load overlap)
+# ---------------------------------------------------------------------------
+
+class _StageStats:
+    def __init__(self):
+        self.busy = 0.0
+        self.batches = 0
+        self.depth_samples: list[int] = []
+
+
+def run_pipelined_etl(batch_size: int = 50, source: SourceDatabase | None = None,
+                      destination=None, queue_size: int = 4, copy: bool = True,
+                      transform_fn=transform) -> dict:
+    """Run extract, transform and load in three threads joined by bounded queues.
+
+    The extract thread reads ahead with its own cursor, but the extractor's
+    watermark only advances in the load thread after ``upsert`` has
+    committed a batch, so a crash never skips records that were extracted
+    but not loaded.  Threads help when stages release the GIL, e.g. waiting
+    on a remote source or inside SQLite.
+    """
+    source = source or SourceDatabase(total_records=200)
+    extractor = Extractor(source, copy=copy)
+    destination = destination if destination is not None else DestinationStore()
+    raw_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    clean_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    stats = {name: _StageStats() for name in ("extract", "transform", "load")}
+    errors: list[BaseException] = []
+    totals = {"extracted": 0, "clean": 0, "quarantined": 0}
+
+    def put(q: queue.Queue, item, stage: _StageStats) -> None:
+        stage.depth_samples.append(q.qsize())
+        q.put(item)
+
+    def extract_stage() -> None:
+        st = stats["extract"]
+        cursor = extractor.watermark
+        try:
+            while not errors:
+                start = time.perf_counter()
+                raw = extractor.extract_batch(batch_size, after_id=cursor)
+                st.busy += time.perf_counter() - start
+                if not raw:
+                    break
+                cursor = raw[-1]["id"]
+                st.batches += 1
+                put(raw_q, raw, st)
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            raw_q.put(None)
+
+    def transform_stage() -> None:
+        st = stats["transform"]
+        try:
+            while (raw := raw_q.get()) is not None:
+                start = time.perf_counter()
+                result = transform_fn(raw)
+                st.busy += time.perf_counter() - start
+                st.batches += 1
+                put(clean_q, (raw, result), st)
+        except BaseException as exc:
+            errors.append(exc)
+            while raw_q.get() is not None:  # unblock the extract stage
+                pass
+        finally:
+            clean_q.put(None)
+
+    def load_stage() -> None:
+        st = stats["load"]
+        try:
+            while (item := clean_q.get()) is not None:
+                raw, result = item
+                start = time.perf_counter()
+                destination.upsert(result.clean)
+                extractor.advance_watermark(raw)  # only after the load committed
+                st.busy += time.perf_counter() - start
+                st.batches += 1
+                totals["extracted"] += len(raw)
+                totals["clean"] += result.clean_count
+                totals["quarantined"] += result.quarantine_count
+        except BaseException as exc:
+            errors.append(exc)
+            while clean_q.get() is not None:  # unblock upstream stages
+                pass
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=fn, name=fn.__name__)
+               for fn in (extract_stage, transform_stage, load_stage)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    return {
+        **totals,
+        "destination": destination,
+        "watermark": extractor.watermark,
+        "wall": wall,
+        "utilization": {name: st.busy / wall for name, st in stats.items()},
+        "queue_depth": {
+            "raw": _depth_summary(stats["extract"].depth_samples),
+            "clean": _depth_summary(stats["transform"].depth_samples),
+        },
+    }
+
+
+def _depth_summary(samples: list[int]) -> str:
+    if not samples:
+        return "n/a"
+    return f"avg {sum(samples) / len(samples):.1f} / max {max(samples)}"
 
 
 # ---------------------------------------------------------------------------
@@ -294,11 +1069,420 @@ def demonstrate_idempotency() -> None:
     print("  Assertion passed: upsert is idempotent ✓")
 
 
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+class _ScanningSource(SourceDatabase):
+    """The original read path: full scan and deepcopy of every match per call."""
+
+    def read_incremental(self, after_id: int, limit: int = 50, copy: bool = True) -> list:
+        return [deepcopy(r) for r in self._records if r["id"] > after_id][:limit]
+
+
+def benchmark_incremental_reads(total_records: int = 1_000_000, scan_records: int = 5_000,
+                                batch_size: int = 500) -> None:
+    """Time run_full_etl with scanning vs indexed reads (copies and views)."""
+    print()
+    print("-" * 60)
+    print("Incremental read benchmark")
+    print("-" * 60)
+
+    def timed(source, copy=True):
+        start = time.perf_counter()
+        dest = run_full_etl(batch_size=batch_size, source=source, copy=copy, verbose=False)
+        return time.perf_counter() - start, dest.row_count
+
+    scan_source = _ScanningSource(total_records=scan_records)
+    small = SourceDatabase(total_records=scan_records)
+    scan_s, rows = timed(scan_source)
+    idx_s, idx_rows = timed(small)
+    print(f"  {scan_records:>9,} records  full scan     : {scan_s:7.2f}s  rows={rows:,}")
+    print(f"  {scan_records:>9,} records  indexed       : {idx_s:7.2f}s  rows={idx_rows:,}"
+          f"  (x{scan_s / idx_s:.0f} faster)")
+
+    print(f"  building a {total_records:,}-record source ...")
+    big = SourceDatabase(total_records=total_records)
+    for label, copy in [("indexed, copies", True), ("indexed, views ", False)]:
+        elapsed, rows = timed(big, copy=copy)
+        print(f"  {total_records:>9,} records  {label}: {elapsed:7.2f}s  rows={rows:,}  "
+              f"({total_records / elapsed:,.0f} records/s)")
+
+
+def benchmark_compiled_transform(total_records: int = 200_000) -> None:
+    """transform() vs the compiled rule spec, in-process and in a process pool."""
+    print()
+    print("-" * 60)
+    print(f"Compiled transform benchmark  ({total_records:,} records)")
+    print("-" * 60)
+    source = SourceDatabase(total_records=total_records)
+    records = source.read_incremental(after_id=0, limit=total_records, copy=False)
+
+    reference = None
+    for label, fn in [
+        ("transform()         ", transform),
+        ("compiled spec       ", compiled_transform),
+        ("compiled, processes ", transform_parallel),
+    ]:
+        elapsed = float("inf")
+        for _ in range(3):  # best of three, to damp GC and warm-up noise
+            start = time.perf_counter()
+            result = fn(records)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        if reference is None:
+            reference, baseline = result, elapsed
+        same = (result.clean == reference.clean
+                and result.quarantined == reference.quarantined)
+        print(f"  {label}: {total_records / elapsed:>10,.0f} records/s  "
+              f"x{baseline / elapsed:.2f}  identical output: {same}")
+
+
+def demonstrate_materialized_views(total_records: int = 50_000, polls: int = 50) -> None:
+    """Check incremental views against full recomputation and time dashboard polls."""
+    print()
+    print("-" * 60)
+    print("Incrementally maintained aggregates")
+    print("-" * 60)
+    rows = compiled_transform(
+        SourceDatabase(total_records=total_records).read_incremental(0, total_records, copy=False)
+    ).clean
+    dest = DestinationStore()
+    dest.register_view("quantity_by_region", lambda r: r["region"], lambda r: r["quantity"])
+
+    start = time.perf_counter()
+    dest.upsert(rows)
+    load_s = time.perf_counter() - start
+
+    # Updates that move rows between groups and change their values.
+    rng = random.Random(3)
+    changed = [
+        {**r, "category": rng.choice(["books", "toys"]), "revenue": round(r["revenue"] * 1.1, 2)}
+        for r in rng.sample(rows, len(rows) // 5)
+    ]
+    dest.upsert(changed)
+    # A late view is backfilled from the rows already loaded.
+    dest.register_view("revenue_by_id_bucket",
+                       lambda r: r["id"] % 10, lambda r: r["revenue"])
+
+    for name in ["revenue_by_category", "quantity_by_region", "revenue_by_id_bucket"]:
+        incremental, full = dest.view(name), dest.recompute_view(name)
+        assert incremental.keys() == full.keys() and all(
+            abs(incremental[g] - full[g]) < 0.01 for g in full
+        ), f"view {name} diverged from full recomputation"
+    print(f"  {dest.row_count:,} rows, {dest.updates:,} updates: "
+          f"all views match full recomputation ✓")
+
+    start = time.perf_counter()
+    for _ in range(polls):
+        dest.aggregate_revenue_by_category()
+    view_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(polls):
+        dest.recompute_view("revenue_by_category")
+    scan_s = time.perf_counter() - start
+    print(f"  initial load with 2 views maintained: {len(rows) / load_s:,.0f} rows/s")
+    print(f"  {polls} polls: incremental {view_s * 1000:.2f} ms vs full rescan "
+          f"{scan_s * 1000:.0f} ms  (x{scan_s / view_s:,.0f})")
+
+
+def benchmark_sqlite_load(total_records: int = 100_000, row_at_a_time_rows: int = 5_000) -> None:
+    """Rows/sec into SQLite: row-at-a-time vs bulk batches of several sizes."""
+    print()
+    print("-" * 60)
+    print("SQLite destination load benchmark")
+    print("-" * 60)
+    source = SourceDatabase(total_records=total_records)
+    rows = compiled_transform(source.read_incremental(0, total_records, copy=False)).clean
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = SQLiteDestinationStore(os.path.join(tmp, "row.db"))
+        sample = rows[:row_at_a_time_rows]
+        start = time.perf_counter()
+        dest.upsert_row_at_a_time(sample)
+        elapsed = time.perf_counter() - start
+        dest.close()
+        print(f"  {'row-at-a-time':<19}: {len(sample) / elapsed:>10,.0f} rows/s  "
+              f"({len(sample):,} rows)")
+
+        for batch_size in [100, 1_000, 10_000]:
+            dest = SQLiteDestinationStore(os.path.join(tmp, f"bulk_{batch_size}.db"))
+            start = time.perf_counter()
+            for i in range(0, len(rows), batch_size):
+                dest.upsert(rows[i:i + batch_size])
+            elapsed = time.perf_counter() - start
+            label = f"bulk, batch={batch_size:,}"
+            print(f"  {label:<19}: {len(rows) / elapsed:>10,.0f} rows/s  "
+                  f"({len(rows):,} rows)")
+            dest.close()
+
+        # Same interface, so it drops into run_full_etl unchanged.
+        dest = SQLiteDestinationStore(os.path.join(tmp, "etl.db"))
+        run_full_etl(batch_size=500, source=source, copy=False, verbose=False,
+                     transform_fn=compiled_transform, destination=dest)
+        run_full_etl(batch_size=500, source=source, copy=False, verbose=False,
+                     transform_fn=compiled_transform, destination=dest)  # re-run: all updates
+        in_memory = DestinationStore()
+        in_memory.upsert(rows)
+        same = _same_totals(dest.aggregate_revenue_by_category(),
+                            in_memory.aggregate_revenue_by_category())
+        print(f"  run_full_etl x2 into SQLite: rows={dest.row_count:,}  inserts={dest.inserts:,}  "
+              f"updates={dest.updates:,}  matches in-memory store: {same}")
+        dest.close()
+
+
+def _same_totals(a: dict, b: dict) -> bool:
+    """Aggregates equal up to float summation order."""
+    return a.keys() == b.keys() and all(abs(a[k] - b[k]) < 0.01 for k in a)
+
+
+class _RemoteSource(SourceDatabase):
+    """Source with a fixed per-read round trip, like a database across the network."""
+
+    def __init__(self, total_records: int, latency: float):
+        super().__init__(total_records)
+        self.latency = latency
+
+    def read_incremental(self, after_id: int, limit: int = 50, copy: bool = True) -> list:
+        time.sleep(self.latency)
+        return super().read_incremental(after_id, limit, copy)
+
+
+def benchmark_pipelined(total_records: int = 50_000, batch_size: int = 500,
+                        read_latency: float = 0.004) -> None:
+    """Sequential run_full_etl vs the threaded pipeline, both loading into SQLite."""
+    print()
+    print("-" * 60)
+    print(f"Pipelined ETL  ({total_records:,} records, {read_latency * 1000:.0f} ms per source read)")
+    print("-" * 60)
+    source = _RemoteSource(total_records, read_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        seq_dest = SQLiteDestinationStore(os.path.join(tmp, "seq.db"))
+        start = time.perf_counter()
+        run_full_etl(batch_size=batch_size, source=source, copy=False, verbose=False,
+                     transform_fn=compiled_transform, destination=seq_dest)
+        seq_s = time.perf_counter() - start
+
+        pipe_dest = SQLiteDestinationStore(os.path.join(tmp, "pipe.db"))
+        stats = run_pipelined_etl(batch_size=batch_size, source=source, destination=pipe_dest,
+                                  copy=False, transform_fn=compiled_transform)
+        same = _same_totals(pipe_dest.aggregate_revenue_by_category(),
+                            seq_dest.aggregate_revenue_by_category())
+        print(f"  sequential : {seq_s:6.2f}s")
+        print(f"  pipelined  : {stats['wall']:6.2f}s  (x{seq_s / stats['wall']:.2f})  "
+              f"watermark={stats['watermark']:,}  same result: {same}")
+        util = "  ".join(f"{k}={v:.0%}" for k, v in stats["utilization"].items())
+        print(f"  stage utilization: {util}")
+        print(f"  queue depth at put: raw {stats['queue_depth']['raw']}, "
+              f"clean {stats['queue_depth']['clean']}")
+        seq_dest.close()
+        pipe_dest.close()
+
+    # A stage error must stop every thread, even while the queues are full.
+    batches = 0
+
+    def failing_transform(records: list) -> TransformResult:
+        nonlocal batches
+        batches += 1
+        time.sleep(0.05)
+        if batches == 3:
+            raise ValueError("bad batch")
+        return compiled_transform(records)
+
+    start = time.perf_counter()
+    try:
+        run_pipelined_etl(batch_size=50, source=SourceDatabase(total_records=2_000),
+                          queue_size=2, copy=False, transform_fn=failing_transform)
+    except ValueError as exc:
+        print(f"  failing transform: stopped after {batches} batches in "
+              f"{time.perf_counter() - start:.2f}s, re-raised {exc!r}")
+
+
+def benchmark_cdc(initial_records: int = 20_000, changes: int = 30_000,
+                  rate: int = 30_000, batch_size: int = 500) -> None:
+    """Watermark vs change-log extraction under concurrent writes: freshness and lag."""
+    print()
+    print("-" * 60)
+    print(f"Change data capture  ({changes:,} writes at ~{rate:,}/s on {initial_records:,} rows)")
+    print("-" * 60)
+    source = SourceDatabase(total_records=initial_records)
+    watermark_dest = DestinationStore()
+    watermark_extractor = Extractor(source, copy=False)
+    run_full_etl(batch_size, source=source, verbose=False, transform_fn=compiled_transform,
+                 destination=watermark_dest, extractor=watermark_extractor)
+
+    cdc = CDCExtractor(source)
+    cdc_dest = DestinationStore()
+    lags: list[float] = []
+    rng = random.Random(9)
+
+    def producer() -> None:
+        next_id = initial_records + 1
+        for i in range(changes):
+            if rng.random() < 0.3:
+                source.insert(_make_record(next_id, seed=next_id * 7))
+                next_id += 1
+            else:
+                source.update(rng.randint(1, initial_records),
+                              amount=str(round(rng.uniform(5.0, 500.0), 2)), returned=False)
+            if i % 100 == 99:
+                time.sleep(100 / rate)
+
+    writer = threading.Thread(target=producer)
+    start = time.perf_counter()
+    writer.start()
+    loaded = 0
+    while writer.is_alive() or cdc.watermark < source.last_seq:
+        batch = cdc.extract_batch(batch_size)
+        if not batch:
+            time.sleep(0.001)
+            continue
+        cdc_dest.upsert(compiled_transform(batch).clean)
+        cdc.advance_watermark(batch)
+        done = time.perf_counter()
+        lags.extend(done - ts for ts in cdc.pending_timestamps)
+        loaded += len(cdc.pending_timestamps)
+    elapsed = time.perf_counter() - start
+    writer.join()
+
+    # The watermark extractor only sees ids above its high-water mark.
+    run_full_etl(batch_size, source=source, verbose=False, transform_fn=compiled_transform,
+                 destination=watermark_dest, extractor=watermark_extractor)
+    truth = DestinationStore()
+    truth.upsert(compiled_transform(source.read_incremental(0, source.last_seq, copy=False)).clean)
+    expected = truth.aggregate_revenue_by_category()
+    stream_lags = sorted(lags[initial_records:])  # exclude the initial snapshot
+    p50 = stream_lags[len(stream_lags) // 2] * 1000
+    p99 = stream_lags[int(len(stream_lags) * 0.99)] * 1000
+    print(f"  CDC: {loaded:,} changes in {elapsed:.2f}s ({loaded / elapsed:,.0f} changes/s), "
+          f"{cdc.collapsed:,} collapsed within batches")
+    print(f"  CDC end-to-end lag: p50={p50:.1f} ms  p99={p99:.1f} ms")
+    print(f"  destination matches source  – watermark: "
+          f"{_same_totals(watermark_dest.aggregate_revenue_by_category(), expected)}, "
+          f"CDC: {_same_totals(cdc_dest.aggregate_revenue_by_category(), expected)}")
+
+
+def benchmark_dedup(total_records: int = 50_000, new_records: int = 25_000,
+                    batch_size: int = 500) -> None:
+    """Replay after a lost watermark: a persistent dedup index with and without a Bloom front."""
+    print()
+    print("-" * 60)
+    print(f"Cross-batch dedup index  ({total_records:,} processed, then a full replay "
+          f"plus {new_records:,} new)")
+    print("-" * 60)
+    source = SourceDatabase(total_records=total_records)
+    with tempfile.TemporaryDirectory() as tmp:
+        for bloom in (False, True):
+            path = os.path.join(tmp, f"seen_{bloom}.db")
+            capacity = total_records + new_records if bloom else None
+            index = DedupIndex(path, bloom_capacity=capacity)
+            run_full_etl(batch_size, source=source, copy=False, verbose=False,
+                         transform_fn=compiled_transform, dedup_index=index)
+            index.close()
+
+            # Restart: the index is reopened from disk, the watermark is not.
+            replay = SourceDatabase(total_records=total_records + new_records)
+            index = DedupIndex(path, bloom_capacity=capacity)
+            dest = DestinationStore()
+            start = time.perf_counter()
+            run_full_etl(batch_size, source=replay, copy=False, verbose=False,
+                         transform_fn=compiled_transform, destination=dest, dedup_index=index)
+            elapsed = time.perf_counter() - start
+            label = "SQLite + Bloom" if bloom else "SQLite only"
+            memory = f"bloom={index.bloom.nbytes / 1024:,.0f} KiB, " if bloom else ""
+            print(f"  {label:<15}: replay run {elapsed * 1000:6.0f} ms, "
+                  f"transformed {index.lookups - index.replayed:,} of {index.lookups:,} rows")
+            print(f"  {'':<15}  {memory}page cache <= 2,048 KiB, "
+                  f"on disk {os.path.getsize(path) / 1024:,.0f} KiB")
+            if bloom:
+                print(f"  {'':<15}  exact lookups skipped: {index.lookups - index.bloom_positives:,}"
+                      f" of {index.lookups:,}, false-positive rate "
+                      f"{index.false_positive_rate:.2%} (target 1.00%)")
+            index.close()
+    # Replaying the whole change log skips loaded rows, but every update
+    # gets a new seq, so the index lets it through, even one that reverts
+    # the row to an image it had before.
+    source = SourceDatabase(total_records=1_000)
+    index, dest = DedupIndex(), DestinationStore()
+    source.update(1, amount="10.0", returned=False)
+    run_full_etl(batch_size, source=source, verbose=False, destination=dest,
+                 extractor=CDCExtractor(source), dedup_index=index)
+    source.update(1, amount="20.0")
+    source.update(1, amount="10.0")
+    run_full_etl(batch_size, source=source, verbose=False, destination=dest,
+                 extractor=CDCExtractor(source), dedup_index=index)
+    print(f"  CDC log replayed after 10 -> 20 -> 10: replays skipped={index.replayed:,}, "
+          f"row 1 amount={dest._rows[1]['amount']}")
+    index.close()
+    print("  Here the exact set fits in its page cache, so a pure-Python Bloom probe")
+    print("  costs more than the lookup it saves; it pays off once lookups hit disk.")
+
+
+def benchmark_instrumentation(total_records: int = 50_000, batch_size: int = 500,
+                              repeats: int = 5) -> None:
+    """Per-phase metrics from run_full_etl, their exports, and what they cost."""
+    print()
+    print("-" * 60)
+    print(f"Per-phase instrumentation  ({total_records:,} records, batch_size={batch_size})")
+    print("-" * 60)
+    source = SourceDatabase(total_records=total_records)
+    plain = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        run_full_etl(batch_size, source=source, copy=False, verbose=False)
+        plain = min(plain, time.perf_counter() - start)
+    metrics = ETLMetrics()
+    run_full_etl(batch_size, source=source, copy=False, verbose=False, metrics=metrics)
+
+    print(f"  {'phase':<10} {'batches':>7} {'rows/s':>12} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'quarantined':>11}")
+    for phase, m in metrics.phases.items():
+        print(f"  {phase:<10} {m.latency.count:>7} {m.rows_per_sec:>12,.0f} "
+              f"{m.latency.quantile(0.5) * 1000:>8.2f} {m.latency.quantile(0.99) * 1000:>8.2f} "
+              f"{m.quarantine_rate:>11.1%}")
+
+    # The hook cost in isolation: replay the same observe() calls on a fresh
+    # instance.  An instrumented vs plain end-to-end comparison would be
+    # swamped by run-to-run noise several times larger than the budget.
+    calls = [(phase, seconds, m.rows // m.latency.count, None)
+             for phase, m in metrics.phases.items()
+             for seconds in [m.latency.sum / m.latency.count] * m.latency.count]
+    quarantined = [{}] * metrics.phases["transform"].quarantined
+    hooks = float("inf")
+    for _ in range(repeats):
+        probe = ETLMetrics()
+        start = time.perf_counter()
+        for phase, seconds, rows, _ in calls:
+            probe.observe(phase, seconds, rows)
+        probe.observe("transform", 0.0, 0, quarantined)
+        hooks = min(hooks, time.perf_counter() - start)
+    print(f"  hook cost: {hooks * 1000:.2f} ms for {len(calls):,} observations = "
+          f"{hooks / plain:.2%} of a {plain * 1000:.0f} ms run (budget 1%)")
+
+    by_reason = ETLMetrics(by_reason=True)
+    run_full_etl(batch_size, source=source, copy=False, verbose=False, metrics=by_reason)
+    reasons = ", ".join(f"{r}={n:,}" for r, n in by_reason.phases["transform"].reasons.items())
+    print(f"  by_reason=True adds a per-row tally: {reasons}")
+
+    prometheus = by_reason.to_prometheus()
+    print(f"  exports: JSON {len(by_reason.to_json()):,} bytes, "
+          f"Prometheus {len(prometheus.splitlines())} lines, e.g.")
+    for line in prometheus.splitlines():
+        if "by_reason_total{" in line or 'le="0.005"' in line:
+            print(f"    {line}")
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 def main() -> None:
+    ap = argparse.ArgumentParser(description="ETL pipeline demo.")
+    ap.add_argument("--bench", action="store_true",
+                    help="Also run the benchmarks (incremental reads, compiled transform, "
+                         "views, SQLite load, pipelining, CDC, dedup, instrumentation).")
+    args = ap.parse_args()
+
     print("=" * 60)
     print("ETL Pipeline Demo")
     print("=" * 60)
@@ -316,12 +1500,29 @@ def main() -> None:
 
     demonstrate_idempotency()
 
+    if args.bench:
+        # Pass total_records=1_000_000 for the full-size comparison.
+        benchmark_incremental_reads(total_records=100_000)
+        benchmark_compiled_transform(total_records=100_000)
+        demonstrate_materialized_views()
+        benchmark_sqlite_load()
+        benchmark_pipelined()
+        benchmark_cdc()
+        benchmark_dedup()
+        benchmark_instrumentation()
+    else:
+        print()
+        print("  (run with --bench for the incremental-read, compiled-transform, view,")
+        print("   SQLite, pipelined, CDC, dedup and instrumentation benchmarks)")
+
     print()
     print("Key takeaways:")
     print("  1. Watermark-based extraction avoids reprocessing the full source every run.")
     print("  2. Transform stages clean messy data and quarantine unprocessable records.")
     print("  3. Upsert semantics in the load phase make the pipeline idempotent and")
     print("     safe to retry after failures.")
+    print("  4. A persistent dedup index keeps replays out of the transform even after")
+    print("     the watermark is lost; a Bloom filter spares new keys an exact lookup.")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 """
 Sliding-window stream processing pipeline.
 
-Simulates a real-time event stream with tumbling and sliding window
-aggregations.  Events arrive with timestamps and the pipeline computes
+Simulates a real-time event stream with tumbling, sliding and session
+window aggregations.  Events arrive with timestamps and the pipeline computes
 windowed counts, sums, and averages — common patterns in metrics and
 log processing backends.
 
@@ -12,6 +12,15 @@ Usage:
     python stream_processing_example.py
 """
 
+import asyncio
+import heapq
+import os
+import random
+import struct
+import tempfile
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right
 from collections import deque
 
 
@@ -31,10 +40,12 @@ class TumblingWindow:
     def __init__(self, size: float):
         self.size = size
         self.buckets: dict[int, list[Event]] = {}
+        self.dirty: set[int] = set()  # buckets changed since last checkpoint
 
     def add(self, event: Event):
         bucket_id = int(event.timestamp // self.size)
         self.buckets.setdefault(bucket_id, []).append(event)
+        self.dirty.add(bucket_id)
 
     def results(self):
         for bucket_id in sorted(self.buckets):
@@ -57,14 +68,19 @@ class SlidingWindow:
     def __init__(self, duration: float):
         self.duration = duration
         self.events: deque[Event] = deque()
+        # Monotonic counters let a checkpoint describe the deque as a delta.
+        self.appended = 0
+        self.evicted = 0
 
     def add(self, event: Event):
         self.events.append(event)
+        self.appended += 1
         self._evict(event.timestamp)
 
     def _evict(self, now: float):
         while self.events and self.events[0].timestamp < now - self.duration:
             self.events.popleft()
+            self.evicted += 1
 
     def snapshot(self, now: float):
         self._evict(now)
@@ -78,6 +94,601 @@ class SlidingWindow:
         }
 
 
+class Session:
+    """A burst of activity for one key: [start, end + gap) once closed."""
+
+    def __init__(self, timestamp: float, value: float):
+        self.start = timestamp
+        self.end = timestamp
+        self.count = 1
+        self.total = value
+        self.alive = True
+
+    def absorb(self, other: "Session"):
+        self.start = min(self.start, other.start)
+        self.end = max(self.end, other.end)
+        self.count += other.count
+        self.total += other.total
+        other.alive = False
+
+
+class SessionWindow:
+    """Per-key session windows separated by an inactivity gap.
+
+    Each key keeps its open sessions sorted by start time, so locating the
+    sessions an event touches is a binary search.  Because open sessions of
+    a key are always at least ``gap`` apart, an event can bridge at most two
+    of them, which keeps merges cheap even when late events arrive.
+
+    Sessions are closed (and their state dropped) once the watermark passes
+    ``end + gap``; a min-heap of expiry times makes eviction independent of
+    the number of keys.  A late event is merged into an open session it
+    overlaps and dropped only when it overlaps none.
+    """
+
+    def __init__(self, gap: float):
+        self.gap = gap
+        self.watermark = float("-inf")
+        self.dropped = 0
+        self._starts: dict[str, list[float]] = {}
+        self._sessions: dict[str, list[Session]] = {}
+        self._expiry: list[tuple[float, int, str, Session]] = []
+        self._seq = 0
+
+    def add(self, event: Event):
+        t = event.timestamp
+        starts = self._starts.get(event.key, [])
+        sessions = self._sessions.get(event.key, [])
+
+        # Open sessions overlapping (t - gap, t + gap) form a contiguous run
+        # ending just before the first session starting at or after t + gap.
+        hi = bisect_left(starts, t + self.gap)
+        lo = hi
+        while lo > 0 and sessions[lo - 1].end > t - self.gap:
+            lo -= 1
+        if lo == hi and t + self.gap <= self.watermark:
+            # On its own, its session would already have been closed and emitted.
+            self.dropped += 1
+            return
+
+        starts = self._starts.setdefault(event.key, starts)
+        sessions = self._sessions.setdefault(event.key, sessions)
+        session = Session(t, event.value)
+        for other in sessions[lo:hi]:
+            session.absorb(other)
+
+        starts[lo:hi] = [session.start]
+        sessions[lo:hi] = [session]
+        self._seq += 1
+        heapq.heappush(
+            self._expiry, (session.end + self.gap, self._seq, event.key, session)
+        )
+
+    def advance_watermark(self, watermark: float) -> list[dict]:
+        """Close every session whose gap has elapsed and return its result."""
+        self.watermark = max(self.watermark, watermark)
+        closed = []
+        while self._expiry and self._expiry[0][0] <= self.watermark:
+            expiry, _, key, session = heapq.heappop(self._expiry)
+            # Entries go stale when a session is extended or merged away.
+            if not session.alive or session.end + self.gap != expiry:
+                continue
+            closed.append(self._close(key, session))
+        return closed
+
+    def flush(self) -> list[dict]:
+        """Close all open sessions, e.g. at end of input."""
+        return self.advance_watermark(float("inf"))
+
+    @property
+    def open_sessions(self) -> int:
+        return sum(len(s) for s in self._sessions.values())
+
+    def _close(self, key: str, session: Session) -> dict:
+        starts = self._starts[key]
+        sessions = self._sessions[key]
+        idx = bisect_left(starts, session.start)
+        del starts[idx]
+        del sessions[idx]
+        session.alive = False
+        if not sessions:
+            del self._starts[key]
+            del self._sessions[key]
+        return {
+            "key": key,
+            "window": f"[{session.start:.1f}, {session.end + self.gap:.1f})",
+            "count": session.count,
+            "sum": session.total,
+            "avg": round(session.total / session.count, 2),
+        }
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch tracking at most ``capacity`` keys.
+
+    Counters live in a stream-summary: keys grouped by count, with the
+    minimum count tracked, so each update is O(1).  When a new key arrives
+    and the sketch is full, it replaces a key holding the minimum count
+    ``m`` and starts at ``m + 1`` with error ``m``.
+
+    Error bounds, for a stream of ``n`` events:
+      - every reported count over-estimates the true count by at most its
+        ``error``, and ``error <= n / capacity``;
+      - every key whose true count exceeds ``n / capacity`` is tracked, so
+        with ``capacity >= k / eps`` the top-k keys with frequency above
+        ``eps * n`` are never missed.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.n = 0
+        self.counts: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self._by_count: dict[int, dict[str, None]] = {}
+        self._min = 0
+
+    def add(self, key: str):
+        self.n += 1
+        count = self.counts.get(key)
+        if count is None:
+            if len(self.counts) < self.capacity:
+                self.counts[key] = 1
+                self.errors[key] = 0
+                self._by_count.setdefault(1, {})[key] = None
+                self._min = 1
+                return
+            victim = next(iter(self._by_count[self._min]))
+            count = self.counts.pop(victim)
+            del self.errors[victim]
+            self._by_count[count][key] = self._by_count[count].pop(victim)
+            self.counts[key] = count
+            self.errors[key] = count
+        bucket = self._by_count[count]
+        del bucket[key]
+        if not bucket:
+            del self._by_count[count]
+            if count == self._min:
+                self._min = count + 1
+        self._by_count.setdefault(count + 1, {})[key] = None
+        self.counts[key] = count + 1
+
+    @property
+    def min_count(self) -> int:
+        """Upper bound on the count of any key the sketch is not tracking."""
+        return self._min if len(self.counts) >= self.capacity else 0
+
+    def top(self, k: int) -> list[tuple[str, int, int]]:
+        """Top *k* as (key, estimated count, max over-estimate)."""
+        ranked = heapq.nlargest(k, self.counts.items(), key=lambda kv: kv[1])
+        return [(key, count, self.errors[key]) for key, count in ranked]
+
+
+def merge_top_k(sketches: list[SpaceSaving], k: int) -> list[tuple[str, int, int]]:
+    """Combine per-pane sketches; an untracked key may have up to ``min_count``."""
+    counts: dict[str, int] = {}
+    errors: dict[str, int] = {}
+    for sketch in sketches:
+        for key in sketch.counts:
+            counts.setdefault(key, 0)
+            errors.setdefault(key, 0)
+    for sketch in sketches:
+        floor = sketch.min_count
+        for key in counts:
+            if key in sketch.counts:
+                counts[key] += sketch.counts[key]
+                errors[key] += sketch.errors[key]
+            else:
+                counts[key] += floor
+                errors[key] += floor
+    ranked = heapq.nlargest(k, counts.items(), key=lambda kv: kv[1])
+    return [(key, count, errors[key]) for key, count in ranked]
+
+
+class TopKTumblingWindow:
+    """Tumbling windows that keep a fixed-size SpaceSaving sketch per bucket."""
+
+    def __init__(self, size: float, k: int = 10, capacity: int = 1000):
+        self.size = size
+        self.k = k
+        self.capacity = capacity
+        self.buckets: dict[int, SpaceSaving] = {}
+
+    def add(self, event: Event):
+        bucket_id = int(event.timestamp // self.size)
+        sketch = self.buckets.get(bucket_id)
+        if sketch is None:
+            sketch = self.buckets[bucket_id] = SpaceSaving(self.capacity)
+        sketch.add(event.key)
+
+    def results(self):
+        for bucket_id in sorted(self.buckets):
+            start = bucket_id * self.size
+            sketch = self.buckets[bucket_id]
+            yield {
+                "window": f"[{start:.0f}, {start + self.size:.0f})",
+                "count": sketch.n,
+                "top": sketch.top(self.k),
+                "max_error": sketch.n // self.capacity,
+            }
+
+
+class TopKSlidingWindow:
+    """Sliding top-k built from ``panes`` sub-window sketches.
+
+    Space-Saving cannot forget individual events, so the window is divided
+    into panes of ``duration / panes`` seconds; expired panes are dropped
+    whole and the live ones are merged on ``snapshot``.  The window edge is
+    therefore accurate to one pane, and memory is ``panes * capacity``.
+    """
+
+    def __init__(self, duration: float, panes: int = 4, k: int = 10, capacity: int = 1000):
+        self.duration = duration
+        self.pane_size = duration / panes
+        self.k = k
+        self.capacity = capacity
+        self.panes: deque[tuple[int, SpaceSaving]] = deque()
+
+    def add(self, event: Event):
+        pane_id = int(event.timestamp // self.pane_size)
+        if not self.panes or self.panes[-1][0] < pane_id:
+            self.panes.append((pane_id, SpaceSaving(self.capacity)))
+        # Late events land in the newest pane; its window edge absorbs them.
+        self.panes[-1][1].add(event.key)
+        self._evict(event.timestamp)
+
+    def _evict(self, now: float):
+        while self.panes and (self.panes[0][0] + 1) * self.pane_size <= now - self.duration:
+            self.panes.popleft()
+
+    def snapshot(self, now: float):
+        self._evict(now)
+        sketches = [sketch for _, sketch in self.panes]
+        return {
+            "window": f"({now - self.duration:.0f}, {now:.0f}]",
+            "count": sum(sk.n for sk in sketches),
+            "top": merge_top_k(sketches, self.k),
+        }
+
+
+class _JoinSide:
+    """Per-key, time-ordered buffer for one input of an IntervalJoin."""
+
+    def __init__(self):
+        self.times: dict[str, list[float]] = {}
+        self.events: dict[str, list[Event]] = {}
+        self.expiry: list[tuple[float, str]] = []  # heap of (expires_at, key)
+        self.size = 0
+
+    def insert(self, event: Event, expires_at: float):
+        times = self.times.setdefault(event.key, [])
+        events = self.events.setdefault(event.key, [])
+        if not times or times[-1] <= event.timestamp:
+            times.append(event.timestamp)  # in-order fast path
+            events.append(event)
+        else:
+            idx = bisect_right(times, event.timestamp)
+            times.insert(idx, event.timestamp)
+            events.insert(idx, event)
+        heapq.heappush(self.expiry, (expires_at, event.key))
+        self.size += 1
+
+    def range(self, key: str, lo: float, hi: float) -> list[Event]:
+        times = self.times.get(key)
+        if not times:
+            return []
+        return self.events[key][bisect_left(times, lo):bisect_right(times, hi)]
+
+    def evict(self, cutoff: float, horizon: float):
+        """Drop events whose timestamp + *horizon* is below *cutoff*."""
+        while self.expiry and self.expiry[0][0] < cutoff:
+            _, key = heapq.heappop(self.expiry)
+            times = self.times.get(key)
+            if not times:
+                continue
+            n = bisect_left(times, cutoff - horizon)
+            if n:
+                del times[:n]
+                del self.events[key][:n]
+                self.size -= n
+            if not times:
+                del self.times[key]
+                del self.events[key]
+
+
+class IntervalJoin:
+    """Join two keyed streams where left.t + lower <= right.t <= left.t + upper.
+
+    Both sides are buffered per key in timestamp order, so matching an
+    event is a binary search in that key's buffer: the cost depends on the
+    matches for that key, not on the total number of buffered events.
+    Once the watermark passes, a left event can no longer meet a future
+    right event after ``t + upper`` and a right event can no longer meet a
+    future left event after ``t - lower``; both are evicted at that point.
+    Only events behind the watermark are dropped as late: an on-time event
+    still finds every buffered match, even when its own eviction point has
+    already passed (``lower > 0`` or ``upper < 0``).
+    """
+
+    def __init__(self, lower: float, upper: float):
+        if lower > upper:
+            raise ValueError("lower bound must not exceed upper bound")
+        self.lower = lower
+        self.upper = upper
+        self.watermark = float("-inf")
+        self.dropped = 0
+        self._left = _JoinSide()
+        self._right = _JoinSide()
+
+    def add_left(self, event: Event) -> list[tuple[Event, Event]]:
+        t = event.timestamp
+        if t < self.watermark:
+            self.dropped += 1
+            return []
+        matches = self._right.range(event.key, t + self.lower, t + self.upper)
+        if t + self.upper >= self.watermark:
+            self._left.insert(event, t + self.upper)
+        return [(event, r) for r in matches]
+
+    def add_right(self, event: Event) -> list[tuple[Event, Event]]:
+        t = event.timestamp
+        if t < self.watermark:
+            self.dropped += 1
+            return []
+        matches = self._left.range(event.key, t - self.upper, t - self.lower)
+        if t - self.lower >= self.watermark:
+            self._right.insert(event, t - self.lower)
+        return [(l, event) for l in matches]
+
+    def advance_watermark(self, watermark: float):
+        self.watermark = max(self.watermark, watermark)
+        self._left.evict(self.watermark, self.upper)
+        self._right.evict(self.watermark, -self.lower)
+
+    @property
+    def buffered(self) -> int:
+        return self._left.size + self._right.size
+
+
+class AsyncPipeline:
+    """Stages run as asyncio tasks connected by bounded queues.
+
+    Each stage has ``concurrency`` worker tasks, so I/O-bound stages (an
+    enrichment lookup, a sink write) overlap their waits.  Queues hold at
+    most ``queue_size`` events: when a downstream stage falls behind, the
+    full queue suspends its producer, and a slow sink throttles the source
+    instead of letting memory grow.  With concurrency > 1 output order is
+    not preserved.
+    """
+
+    _DONE = object()
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self.stages: list = []
+
+    def add_stage(self, name: str, fn, concurrency: int = 1):
+        """*fn* may be a plain function or a coroutine function; None drops the event."""
+        self.stages.append((name, fn, concurrency))
+
+    async def _worker(self, fn, inbox: asyncio.Queue, outbox: asyncio.Queue, depth: dict):
+        is_async = asyncio.iscoroutinefunction(fn)
+        while True:
+            item = await inbox.get()
+            if item is self._DONE:
+                return
+            event, ingested = item
+            result = await fn(event) if is_async else fn(event)
+            if result is not None:
+                await outbox.put((result, ingested))
+                depth["max"] = max(depth["max"], outbox.qsize())
+
+    async def _stage(self, fn, concurrency: int, inbox, outbox, depth, downstream: int):
+        await asyncio.gather(*(
+            self._worker(fn, inbox, outbox, depth) for _ in range(concurrency)
+        ))
+        for _ in range(downstream):
+            await outbox.put(self._DONE)
+
+    async def run(self, events) -> dict:
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        depths = [{"max": 0} for _ in self.stages]
+        concurrency = [c for _, _, c in self.stages] + [1]
+        latencies: list[float] = []
+
+        async def source():
+            for ev in events:
+                await queues[0].put((ev, time.perf_counter()))
+            for _ in range(concurrency[0]):
+                await queues[0].put(self._DONE)
+
+        async def drain():
+            while (item := await queues[-1].get()) is not self._DONE:
+                latencies.append(time.perf_counter() - item[1])
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            source(),
+            *(
+                self._stage(fn, c, queues[i], queues[i + 1], depths[i], concurrency[i + 1])
+                for i, (_, fn, c) in enumerate(self.stages)
+            ),
+            drain(),
+        )
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "processed": len(latencies),
+            "elapsed": elapsed,
+            "throughput": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+            # Depth of each stage's output queue; pinned at queue_size means backpressure.
+            "max_queue_depth": {name: d["max"] for (name, _, _), d in zip(self.stages, depths)},
+        }
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[idx]
+
+
+_HEADER = struct.Struct("<4sBQI")   # magic, kind, source offset, bucket count
+_BUCKET = struct.Struct("<qI")      # bucket id, event count
+_SLIDING = struct.Struct("<QQI")    # evicted total, first index, event count
+_EVENT = struct.Struct("<ddH")      # timestamp, value, key length
+_MAGIC = b"SCK1"
+_FULL, _DELTA = 0, 1
+
+
+def _pack_events(events) -> bytes:
+    parts = []
+    for e in events:
+        key = e.key.encode()
+        parts.append(_EVENT.pack(e.timestamp, e.value, len(key)))
+        parts.append(key)
+    return b"".join(parts)
+
+
+def _unpack_events(buf: bytes, pos: int, n: int) -> tuple[list[Event], int]:
+    events = []
+    for _ in range(n):
+        ts, value, klen = _EVENT.unpack_from(buf, pos)
+        pos += _EVENT.size
+        events.append(Event(ts, buf[pos:pos + klen].decode(), value))
+        pos += klen
+    return events, pos
+
+
+class StateCheckpointer:
+    """Periodic, incremental snapshots of window state to a local directory.
+
+    Every ``interval`` events a binary delta file is written holding only
+    what changed since the previous checkpoint: the new events of each dirty
+    tumbling bucket, and the sliding window's appended events plus its
+    eviction count.  Every ``full_every`` checkpoints a full snapshot is
+    written instead and older files are removed, which bounds recovery time.
+    Each file records the source offset it covers so that a restarted
+    processor can resume reading from there.
+    """
+
+    def __init__(self, directory: str, tumbling: TumblingWindow,
+                 sliding: SlidingWindow, interval: int = 1000, full_every: int = 10):
+        self.directory = directory
+        self.tumbling = tumbling
+        self.sliding = sliding
+        self.interval = interval
+        self.full_every = full_every
+        self.checkpoints = 0
+        self.bytes_written = 0
+        self._since_last = 0
+        self._persisted: dict[int, int] = {}  # bucket id -> events on disk
+        self._persisted_appended = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def maybe_checkpoint(self, offset: int) -> bool:
+        """Call once per processed event; *offset* is the next source position."""
+        self._since_last += 1
+        if self._since_last < self.interval:
+            return False
+        self.checkpoint(offset)
+        return True
+
+    def checkpoint(self, offset: int) -> None:
+        full = self.checkpoints % self.full_every == 0
+        if full:
+            bucket_ids = sorted(self.tumbling.buckets)
+            self._persisted.clear()
+            sliding_new = len(self.sliding.events)
+        else:
+            bucket_ids = sorted(self.tumbling.dirty)
+            sliding_new = min(self.sliding.appended - self._persisted_appended,
+                              len(self.sliding.events))
+
+        parts = [_HEADER.pack(_MAGIC, _FULL if full else _DELTA, offset, len(bucket_ids))]
+        for bucket_id in bucket_ids:
+            events = self.tumbling.buckets[bucket_id]
+            done = self._persisted.get(bucket_id, 0)
+            parts.append(_BUCKET.pack(bucket_id, len(events) - done))
+            parts.append(_pack_events(events[done:]))
+            self._persisted[bucket_id] = len(events)
+
+        tail = list(self.sliding.events)[len(self.sliding.events) - sliding_new:]
+        parts.append(_SLIDING.pack(self.sliding.evicted,
+                                   self.sliding.appended - sliding_new, sliding_new))
+        parts.append(_pack_events(tail))
+
+        self._write(b"".join(parts), full)
+        self.tumbling.dirty.clear()
+        self._persisted_appended = self.sliding.appended
+        self._since_last = 0
+
+    def _write(self, data: bytes, full: bool) -> None:
+        name = os.path.join(self.directory, f"chk-{self.checkpoints:08d}.bin")
+        tmp = name + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, name)  # atomic: a crash never leaves a torn file
+        if full:
+            for old in self._files(self.directory):
+                if old < name:
+                    os.remove(old)
+        self.checkpoints += 1
+        self.bytes_written += len(data)
+
+    @staticmethod
+    def _files(directory: str) -> list[str]:
+        return sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if f.startswith("chk-") and f.endswith(".bin")
+        )
+
+    @classmethod
+    def restore(cls, directory: str, tumbling: TumblingWindow,
+                sliding: SlidingWindow, **kwargs) -> tuple["StateCheckpointer", int]:
+        """Rebuild window state from disk; returns the checkpointer and source offset."""
+        checkpointer = cls(directory, tumbling, sliding, **kwargs)
+        offset = 0
+        first_index = 0  # global append index of sliding.events[0]
+        for path in cls._files(directory):
+            with open(path, "rb") as f:
+                buf = f.read()
+            magic, kind, offset, n_buckets = _HEADER.unpack_from(buf, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"Not a checkpoint file: {path}")
+            pos = _HEADER.size
+            if kind == _FULL:
+                tumbling.buckets.clear()
+            for _ in range(n_buckets):
+                bucket_id, n = _BUCKET.unpack_from(buf, pos)
+                events, pos = _unpack_events(buf, pos + _BUCKET.size, n)
+                tumbling.buckets.setdefault(bucket_id, []).extend(events)
+            evicted, start, n = _SLIDING.unpack_from(buf, pos)
+            events, pos = _unpack_events(buf, pos + _SLIDING.size, n)
+            if kind == _FULL or start > first_index + len(sliding.events):
+                # Anything between the old tail and *start* was evicted unseen.
+                sliding.events.clear()
+                first_index = start
+            sliding.events.extend(events)
+            while first_index < evicted:
+                sliding.events.popleft()
+                first_index += 1
+            sliding.evicted = evicted
+            sliding.appended = start + n
+            # Continue numbering after the last file, not after the count of
+            # surviving files, so new files always sort after old ones.
+            checkpointer.checkpoints = int(os.path.basename(path)[4:-4]) + 1
+
+        tumbling.dirty.clear()
+        checkpointer._persisted = {b: len(ev) for b, ev in tumbling.buckets.items()}
+        checkpointer._persisted_appended = sliding.appended
+        return checkpointer, offset
+
+
 class Pipeline:
     """A simple chain of transform stages applied to each event."""
 
@@ -96,6 +707,239 @@ class Pipeline:
         return current
 
 
+def generate_events(n: int, keys: int = 50, seed: int = 7) -> list[Event]:
+    """Synthetic metric stream with ~100 events per second of event time."""
+    rng = random.Random(seed)
+    return [
+        Event(i / 100.0, f"host-{rng.randrange(keys)}", round(rng.uniform(0, 100), 1))
+        for i in range(n)
+    ]
+
+
+def consume(events: list[Event], start: int, stop: int, tw: TumblingWindow,
+            sw: SlidingWindow, checkpointer: StateCheckpointer | None = None) -> None:
+    for offset in range(start, stop):
+        ev = events[offset]
+        tw.add(ev)
+        sw.add(ev)
+        if checkpointer:
+            checkpointer.maybe_checkpoint(offset + 1)
+
+
+def demonstrate_checkpointing(n_events: int = 200_000, interval: int = 20_000) -> None:
+    events = generate_events(n_events)
+
+    start = time.perf_counter()
+    tw_ref, sw_ref = TumblingWindow(size=60.0), SlidingWindow(duration=30.0)
+    consume(events, 0, n_events, tw_ref, sw_ref)
+    plain = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        tw, sw = TumblingWindow(size=60.0), SlidingWindow(duration=30.0)
+        chk = StateCheckpointer(os.path.join(directory, "full"), tw, sw, interval=interval)
+        consume(events, 0, n_events, tw, sw, chk)
+        checkpointed = time.perf_counter() - start
+        print(f"  {n_events:,} events without checkpoints : {n_events / plain:>10,.0f} events/s")
+        print(f"  {n_events:,} events, every {interval:,} events: "
+              f"{n_events / checkpointed:>10,.0f} events/s  "
+              f"(overhead {100 * (checkpointed - plain) / plain:.1f}%, "
+              f"{chk.checkpoints} files, {chk.bytes_written / 1e6:.1f} MB)")
+
+        # Crash twice, both times after a full snapshot has replaced older
+        # files; each time restore and resume from the checkpointed offset.
+        crash_dir = os.path.join(directory, "crash")
+        tw, sw = TumblingWindow(size=60.0), SlidingWindow(duration=30.0)
+        chk = StateCheckpointer(crash_dir, tw, sw, interval=interval, full_every=4)
+        offset = 0
+        for fraction in (0.55, 0.85):
+            crash_at = int(n_events * fraction) + interval // 3
+            consume(events, offset, crash_at, tw, sw, chk)
+            del tw, sw, chk
+
+            start = time.perf_counter()
+            tw, sw = TumblingWindow(size=60.0), SlidingWindow(duration=30.0)
+            chk, offset = StateCheckpointer.restore(crash_dir, tw, sw, interval=interval,
+                                                    full_every=4)
+            recovery = time.perf_counter() - start
+            print(f"  crashed at offset {crash_at:,}; restored offset {offset:,} "
+                  f"in {recovery * 1000:.1f} ms")
+        consume(events, offset, n_events, tw, sw, chk)
+
+    print(f"  replayed {n_events - offset:,} events after the last restore")
+    same = (
+        {b: len(e) for b, e in tw.buckets.items()} == {b: len(e) for b, e in tw_ref.buckets.items()}
+        and sw.snapshot(events[-1].timestamp) == sw_ref.snapshot(events[-1].timestamp)
+    )
+    print(f"  state after resume matches uninterrupted run: {same}")
+
+
+def demonstrate_async_pipeline(n_events: int = 200, lookup_s: float = 0.005,
+                               sink_s: float = 0.001) -> None:
+    events = generate_events(n_events)
+
+    # Synchronous baseline: every lookup and sink write blocks the loop.
+    sync = Pipeline()
+    sync.add_stage("enrich", lambda e: (time.sleep(lookup_s), e)[1])
+    sync.add_stage("sink", lambda e: (time.sleep(sink_s), e)[1])
+    start = time.perf_counter()
+    for ev in events:
+        sync.process(ev)
+    elapsed = time.perf_counter() - start
+    print(f"  sync Pipeline.process           : {n_events / elapsed:>8,.0f} events/s")
+
+    async def enrich(e: Event) -> Event:
+        await asyncio.sleep(lookup_s)  # e.g. a metadata lookup
+        return e
+
+    async def sink(e: Event) -> Event:
+        await asyncio.sleep(sink_s)
+        return e
+
+    for enrich_workers, sink_workers in [(1, 1), (16, 1), (16, 8)]:
+        pipeline = AsyncPipeline(queue_size=32)
+        pipeline.add_stage("parse", lambda e: e if e.value >= 0 else None)
+        pipeline.add_stage("enrich", enrich, concurrency=enrich_workers)
+        pipeline.add_stage("sink", sink, concurrency=sink_workers)
+        stats = asyncio.run(pipeline.run(events))
+        print(f"  async enrich x{enrich_workers:<2} sink x{sink_workers:<2}       : "
+              f"{stats['throughput']:>8,.0f} events/s  "
+              f"p50={stats['p50_ms']:.1f}ms  p99={stats['p99_ms']:.1f}ms  "
+              f"max depth={stats['max_queue_depth']}")
+
+
+def generate_request_response(n: int, seed: int = 11) -> list[tuple[str, Event]]:
+    """Requests at 1000/s keyed by request id; ~95% get a response within 0.5s."""
+    rng = random.Random(seed)
+    stream = []
+    for i in range(n):
+        t = i / 1000.0
+        key = f"req-{i}"
+        stream.append(("left", Event(t, key, 1.0)))
+        if rng.random() < 0.95:
+            stream.append(("right", Event(t + min(rng.expovariate(20.0), 0.6), key, 1.0)))
+    stream.sort(key=lambda item: item[1].timestamp)
+    return stream
+
+
+class _NaiveJoin:
+    """Baseline: one global buffer per side, scanned linearly for each lookup."""
+
+    def __init__(self, lower: float, upper: float):
+        self.lower, self.upper = lower, upper
+        self.left: deque[Event] = deque()
+        self.right: deque[Event] = deque()
+
+    def add_left(self, e: Event):
+        self.left.append(e)
+        return [(e, r) for r in self.right
+                if r.key == e.key and e.timestamp + self.lower <= r.timestamp <= e.timestamp + self.upper]
+
+    def add_right(self, e: Event):
+        self.right.append(e)
+        return [(l, e) for l in self.left
+                if l.key == e.key and l.timestamp + self.lower <= e.timestamp <= l.timestamp + self.upper]
+
+    def advance_watermark(self, wm: float):
+        while self.left and self.left[0].timestamp + self.upper < wm:
+            self.left.popleft()
+        while self.right and self.right[0].timestamp - self.lower < wm:
+            self.right.popleft()
+
+
+def run_join(join, stream, watermark_every: int = 500) -> tuple[int, float, int]:
+    joined = peak = 0
+    start = time.perf_counter()
+    for i, (side, ev) in enumerate(stream, start=1):
+        joined += len(join.add_left(ev) if side == "left" else join.add_right(ev))
+        if i % watermark_every == 0:
+            join.advance_watermark(ev.timestamp)
+            peak = max(peak, getattr(join, "buffered", 0))
+    return joined, time.perf_counter() - start, peak
+
+
+def _brute_force_join(stream, lower: float, upper: float) -> int:
+    """Count every matching (left, right) pair, with no watermark or eviction."""
+    lefts: dict[str, list[float]] = {}
+    for side, ev in stream:
+        if side == "left":
+            lefts.setdefault(ev.key, []).append(ev.timestamp)
+    return sum(
+        1
+        for side, ev in stream if side == "right"
+        for t in lefts.get(ev.key, ())
+        if t + lower <= ev.timestamp <= t + upper
+    )
+
+
+def demonstrate_interval_join() -> None:
+    for n_requests in [5_000, 200_000]:
+        stream = generate_request_response(n_requests)
+        joined, elapsed, peak = run_join(IntervalJoin(lower=0.0, upper=0.5), stream)
+        line = (f"  {n_requests:>7,} keys  indexed: {len(stream) / elapsed:>9,.0f} events/s  "
+                f"joined={joined:,}  peak buffered={peak:,}")
+        if n_requests <= 5_000:
+            naive_joined, naive_elapsed, _ = run_join(_NaiveJoin(0.0, 0.5), stream)
+            assert naive_joined == joined
+            line += f"  | naive scan: {len(stream) / naive_elapsed:,.0f} events/s"
+        print(line)
+    # With lower > 0 a right event's eviction point is behind its own
+    # timestamp, but it is still on time and must meet buffered lefts.
+    stream = generate_request_response(5_000)
+    join = IntervalJoin(lower=0.1, upper=0.5)
+    joined, _, _ = run_join(join, stream)
+    expected = _brute_force_join(stream, 0.1, 0.5)
+    assert joined == expected and join.dropped == 0
+    print(f"  lower=0.1: joined={joined:,} = brute force {expected:,}, dropped={join.dropped}")
+
+
+def demonstrate_top_k(n_events: int = 200_000, universe: int = 200_000,
+                      k: int = 10, capacity: int = 1_000) -> None:
+    rng = random.Random(5)
+    weights = [1.0 / (rank ** 1.1) for rank in range(1, universe + 1)]  # Zipf-like
+    keys = [f"user-{r}" for r in rng.choices(range(universe), weights=weights, k=n_events)]
+    events = [Event(i / 1000.0, key, 1.0) for i, key in enumerate(keys)]
+    window = events[-1].timestamp + 1
+
+    def exact():
+        counts: dict[str, int] = {}
+        for ev in events:
+            counts[ev.key] = counts.get(ev.key, 0) + 1
+        return counts
+
+    def sketched():
+        tw = TopKTumblingWindow(size=window, k=k, capacity=capacity)
+        for ev in events:
+            tw.add(ev)
+        return tw
+
+    for name, build in [("exact dict", exact), (f"SpaceSaving({capacity})", sketched)]:
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        build()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {name:<18}: {n_events / elapsed:>9,.0f} events/s  peak mem {peak / 1e6:6.2f} MB")
+        if name == "exact dict":
+            truth = result
+            true_top = {key for key, _ in heapq.nlargest(k, truth.items(), key=lambda kv: kv[1])}
+        else:
+            w = next(result.results())
+            found = {key for key, _, _ in w["top"]}
+            worst = max(count - truth[key] for key, count, _ in w["top"])
+            print(f"  top-{k} recall {len(found & true_top)}/{k}, worst over-estimate {worst} "
+                  f"(bound n/capacity = {w['max_error']})")
+
+    sw = TopKSlidingWindow(duration=60.0, panes=6, k=3, capacity=capacity)
+    for ev in events:
+        sw.add(ev)
+    snap = sw.snapshot(events[-1].timestamp)
+    print(f"  sliding {snap['window']} over {snap['count']:,} events: "
+          f"{[(key, count) for key, count, _ in snap['top']]}")
+
+
 def main():
     print("=" * 60)
     print("Stream Processing Pipeline Demo")
@@ -159,6 +1003,42 @@ def main():
         print(f"  t={snap_time:5.1f}  {s['window']}  count={s['count']}  avg={s['avg']}")
     print()
 
+    # Session windows over all keys, with a late event bridging two sessions
+    print("--- Session windows (gap=2.5s, watermark lags 3s) ---")
+    sess = SessionWindow(gap=2.5)
+    for ev in raw_events:
+        sess.add(ev)
+        for s in sess.advance_watermark(ev.timestamp - 3.0):
+            print(f"  {s['key']:<4} {s['window']:<13} count={s['count']}  avg={s['avg']}")
+    late = Event(9.5, "mem", 50.0)
+    print(f"  late {late} bridges the open mem sessions")
+    sess.add(late)
+    joins, overlaps_none = Event(6.0, "cpu", 70.0), Event(2.0, "mem", 60.0)
+    sess.add(joins)
+    sess.add(overlaps_none)
+    print(f"  late {joins} joins the open cpu session")
+    print(f"  late {overlaps_none} overlaps no open session: dropped={sess.dropped}")
+    for s in sess.flush():
+        print(f"  {s['key']:<4} {s['window']:<13} count={s['count']}  avg={s['avg']}")
+    print(f"  open sessions after flush: {sess.open_sessions}")
+    print()
+
+    print("--- Checkpointed operator state (incremental binary snapshots) ---")
+    demonstrate_checkpointing()
+    print()
+
+    print("--- asyncio pipeline (bounded queues, I/O-bound stages) ---")
+    demonstrate_async_pipeline()
+    print()
+
+    print("--- Interval join: responses within 0.5s of their request ---")
+    demonstrate_interval_join()
+    print()
+
+    print("--- Top-K heavy hitters per window (Space-Saving vs exact) ---")
+    demonstrate_top_k()
+    print()
+
     print("Key takeaway: stream processing applies filters, transforms, and")
     print("windowed aggregations to unbounded event streams in near-real-time.")
 
@@ -6,9 +6,12 @@ Implements a minimal DAG-based orchestrator that:
   - Builds a Directed Acyclic Graph (DAG)
   - Performs a topological sort to determine execution order
   - Runs tasks in topological order, respecting dependencies
-  - Supports parallel execution of independent tasks
+  - Supports parallel execution of independent tasks, either wave by wave
+    or from a ready queue that starts each task as soon as its upstreams succeed
   - Handles task failures with configurable retries and exponential backoff
   - Simulates backfill execution across multiple date partitions
+  - Records every attempt's timing for critical-path analysis and a
+    Chrome trace-event timeline
 
 No external dependencies required.
 
@@ -16,13 +19,24 @@ Usage:
     python workflow_orchestration_example.py
 """
 
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import pickle
 import time
 import random
+import tempfile
 import threading
-from collections import defaultdict, deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict, deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed, wait)
 from dataclasses import dataclass, field
+from datetime import date, timedelta
 from enum import Enum, auto
+from functools import partial
 from typing import Callable
 
 
@@ -37,12 +51,28 @@ class TaskState(Enum):
     FAILED = auto()
     SKIPPED = auto()
     UPSTREAM_FAILED = auto()
+    CACHED = auto()        # output restored from the result store instead of running
+
+
+DONE_STATES = (TaskState.SUCCESS, TaskState.CACHED)
+
+
+EXECUTOR_KINDS = ("thread", "process", "async")
 
 
 # ---------------------------------------------------------------------------
 # Task definition
 # ---------------------------------------------------------------------------
 
+@dataclass
+class Attempt:
+    number: int
+    start: float            # time.perf_counter() timestamps
+    end: float
+    worker: str             # "<pid>:<thread name>" of whatever ran the attempt
+    error: str | None = None
+
+
 @dataclass
 class Task:
     task_id: str
@@ -50,12 +80,20 @@ class Task:
     upstream: list[str] = field(default_factory=list)
     retries: int = 2
     retry_delay: float = 0.1   # seconds (kept short for demo)
+    executor: str = "thread"   # "thread", "process" or "async" (DependencyScheduler)
+    inputs: list[str] | None = None  # context keys the task reads; None means all of them
+    cache: bool = False        # opt in to result caching (needs a result store)
+    version: str = "1"         # bump to invalidate cached results by hand
+    task_type: str | None = None  # concurrency-limit group across runs; defaults to task_id
 
     # Runtime state (populated by the scheduler)
     state: TaskState = field(default=TaskState.PENDING, init=False)
     attempts: int = field(default=0, init=False)
     duration: float = field(default=0.0, init=False)
     error: str | None = field(default=None, init=False)
+    cache_key: str | None = field(default=None, init=False)
+    output_digest: str = field(default="", init=False)
+    attempt_log: list[Attempt] = field(default_factory=list, init=False)
 
 
 # ---------------------------------------------------------------------------
@@ -76,6 +114,10 @@ class DAG:
     def _validate(self) -> None:
         """Check that all upstream references exist and the graph is acyclic."""
         for task in self._tasks.values():
+            if task.executor not in EXECUTOR_KINDS:
+                raise ValueError(f"Task '{task.task_id}' has unknown executor '{task.executor}'")
+            if task.cache and task.inputs is None:
+                raise ValueError(f"Cached task '{task.task_id}' must declare its inputs")
             for up in task.upstream:
                 if up not in self._tasks:
                     raise ValueError(f"Task '{task.task_id}' references unknown upstream '{up}'")
@@ -97,12 +139,8 @@ class DAG:
             if tid not in visited:
                 dfs(tid)
 
-    def topological_sort(self) -> list[list[str]]:
-        """
-        Return tasks grouped into execution waves using Kahn's algorithm.
-        All tasks within a wave have no mutual dependencies and can run in parallel.
-        """
-        self._validate()
+    def dependency_counts(self) -> tuple[dict[str, int], dict[str, list[str]]]:
+        """Return each task's number of upstreams and the tasks depending on it."""
         in_degree: dict[str, int] = {tid: 0 for tid in self._tasks}
         dependents: dict[str, list[str]] = defaultdict(list)
 
@@ -110,6 +148,15 @@ class DAG:
             for up in task.upstream:
                 in_degree[task.task_id] += 1
                 dependents[up].append(task.task_id)
+        return in_degree, dependents
+
+    def topological_sort(self) -> list[list[str]]:
+        """
+        Return tasks grouped into execution waves using Kahn's algorithm.
+        All tasks within a wave have no mutual dependencies and can run in parallel.
+        """
+        self._validate()
+        in_degree, dependents = self.dependency_counts()
 
         queue: deque[str] = deque(tid for tid, deg in in_degree.items() if deg == 0)
         waves: list[list[str]] = []
@@ -135,13 +182,19 @@ class DAG:
 # Scheduler / runner
 # ---------------------------------------------------------------------------
 
+def _worker_name() -> str:
+    return f"{os.getpid()}:{threading.current_thread().name}"
+
+
 class Scheduler:
     """Executes a DAG respecting dependencies, with retries and parallel waves."""
 
-    def __init__(self, dag: DAG, context: dict | None = None, max_workers: int = 4):
+    def __init__(self, dag: DAG, context: dict | None = None, max_workers: int = 4,
+                 verbose: bool = True):
         self._dag = dag
         self._context = context or {}
         self._max_workers = max_workers
+        self._verbose = verbose
         self._lock = threading.Lock()
 
     def _run_task(self, task: Task) -> None:
@@ -154,23 +207,38 @@ class Scheduler:
             start = time.perf_counter()
             try:
                 task.fn(self._context)
-                task.duration = time.perf_counter() - start
+                end = time.perf_counter()
+                task.duration = end - start
+                task.attempt_log.append(Attempt(attempt, start, end, _worker_name()))
                 task.state = TaskState.SUCCESS
                 return
             except Exception as exc:
-                task.duration = time.perf_counter() - start
+                end = time.perf_counter()
+                task.duration = end - start
+                task.attempt_log.append(Attempt(attempt, start, end, _worker_name(), str(exc)))
                 task.error = str(exc)
                 if attempt <= task.retries:
-                    print(
-                        f"    [RETRY {attempt}/{task.retries}] "
-                        f"'{task.task_id}' failed: {exc}  "
-                        f"(waiting {delay:.1f}s)"
-                    )
+                    if self._verbose:
+                        print(
+                            f"    [RETRY {attempt}/{task.retries}] "
+                            f"'{task.task_id}' failed: {exc}  "
+                            f"(waiting {delay:.1f}s)"
+                        )
                     time.sleep(delay)
                     delay *= 2  # exponential backoff
 
         task.state = TaskState.FAILED
 
+    def _report(self, task: Task) -> None:
+        if not self._verbose:
+            return
+        icon = "✓" if task.state in DONE_STATES else "✗"
+        print(
+            f"    {icon} '{task.task_id}': {task.state.name}"
+            f"  (attempts={task.attempts}, duration={task.duration:.3f}s)"
+            + (f"  error={task.error}" if task.error else "")
+        )
+
     def run(self) -> bool:
         """
         Execute all waves in topological order.
@@ -178,6 +246,11 @@ class Scheduler:
         Returns True if all tasks succeeded, False otherwise.
         """
         waves = self._dag.topological_sort()
+        for task in self._dag.tasks.values():
+            if task.executor != "thread":
+                raise ValueError(f"Task '{task.task_id}' needs executor '{task.executor}'; "
+                                 "wave-based Scheduler runs thread tasks only, "
+                                 "use DependencyScheduler")
         all_ok = True
 
         for wave_num, wave in enumerate(waves, start=1):
@@ -191,35 +264,379 @@ class Scheduler:
                 ):
                     task.state = TaskState.UPSTREAM_FAILED
                     all_ok = False
-                    print(f"  ↳ '{tid}': UPSTREAM_FAILED (skipped)")
+                    if self._verbose:
+                        print(f"  ↳ '{tid}': UPSTREAM_FAILED (skipped)")
                 else:
                     runnable.append(task)
 
             if not runnable:
                 continue
 
-            print(f"\n  Wave {wave_num}: {[t.task_id for t in runnable]}")
+            if self._verbose:
+                print(f"\n  Wave {wave_num}: {[t.task_id for t in runnable]}")
             with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
                 futures = {pool.submit(self._run_task, t): t for t in runnable}
                 for future in as_completed(futures):
                     task = futures[future]
-                    icon = "✓" if task.state == TaskState.SUCCESS else "✗"
-                    print(
-                        f"    {icon} '{task.task_id}': {task.state.name}"
-                        f"  (attempts={task.attempts}, duration={task.duration:.3f}s)"
-                        + (f"  error={task.error}" if task.error else "")
-                    )
+                    self._report(task)
                     if task.state != TaskState.SUCCESS:
                         all_ok = False
 
         return all_ok
 
 
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+def _value_fingerprint(value, seen: set[int]) -> bytes:
+    """Hash a captured value: callables by their code, anything else by pickling."""
+    if hasattr(value, "__code__") or isinstance(value, partial):
+        return _code_fingerprint(value, seen).encode()
+    try:
+        return pickle.dumps(value)
+    except Exception as exc:
+        raise ValueError(f"Cannot fingerprint captured value {value!r} for caching") from exc
+
+
+def _code_fingerprint(fn, seen: set[int] | None = None) -> str:
+    """Hash a callable's bytecode, constants, names and captured values.
+
+    Partial arguments and closure cells are included, so two tasks built
+    by the same factory with different parameters get different keys.
+    Python functions the code looks up as globals are hashed the same
+    way, so editing a module-level helper invalidates its callers; other
+    globals (constants, library code) are not, and a change to them needs
+    a ``version`` bump.
+    """
+    seen = set() if seen is None else seen
+    if id(fn) in seen:  # a recursive closure refers to itself
+        return "<recursive>"
+    seen.add(id(fn))
+    parts: list[bytes] = []
+    if isinstance(fn, partial):
+        parts.extend(_value_fingerprint(arg, seen) for arg in fn.args)
+        parts.extend(k.encode() + _value_fingerprint(v, seen)
+                     for k, v in sorted(fn.keywords.items()))
+        fn = fn.func
+    for cell in getattr(fn, "__closure__", None) or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:  # an empty cell
+            parts.append(b"<empty>")
+            continue
+        parts.append(_value_fingerprint(value, seen))
+    scope = getattr(fn, "__globals__", {})
+    stack = [getattr(fn, "__code__", None)]
+    while stack:
+        code = stack.pop()
+        if code is None:
+            parts.append(getattr(fn, "__qualname__", repr(fn)).encode())
+            continue
+        parts.append(code.co_code)
+        for name in code.co_names:
+            parts.append(name.encode())
+            helper = scope.get(name)
+            if hasattr(helper, "__code__") or isinstance(helper, partial):
+                parts.append(_code_fingerprint(helper, seen).encode())
+        for const in code.co_consts:
+            if hasattr(const, "co_code"):
+                stack.append(const)
+            else:
+                parts.append(repr(const).encode())
+    return hashlib.sha256(b"\0".join(parts)).hexdigest()
+
+
+def _digest(output: dict) -> str:
+    return hashlib.sha256(pickle.dumps(sorted(output.items()))).hexdigest()
+
+
+class ResultStore:
+    """Task outputs on local disk, one pickle per cache key, written atomically."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key), "rb") as fh:
+                return pickle.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, output: dict) -> None:
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(output, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+
+# ---------------------------------------------------------------------------
+# Ready-queue scheduler
+# ---------------------------------------------------------------------------
+
+def _timed_call(fn: Callable, arg) -> tuple:
+    """Run one attempt and time it where it runs; module-level so it pickles.
+
+    perf_counter is system-wide on Linux, so process-pool timestamps line
+    up with the parent's.
+    """
+    start = time.perf_counter()
+    try:
+        return True, fn(arg), start, time.perf_counter(), _worker_name()
+    except Exception as exc:
+        return False, exc, start, time.perf_counter(), _worker_name()
+
+
+async def _timed_coroutine(fn: Callable, arg) -> tuple:
+    start = time.perf_counter()
+    worker = f"{os.getpid()}:event loop"
+    try:
+        return True, await fn(arg), start, time.perf_counter(), worker
+    except Exception as exc:
+        return False, exc, start, time.perf_counter(), worker
+
+
+def _wait_for_work(running: dict, retries: list) -> set:
+    """Block until an attempt finishes or the first retry in the heap is due."""
+    timeout = max(0.0, retries[0][0] - time.perf_counter()) if retries else None
+    if running:
+        return wait(running, timeout=timeout, return_when=FIRST_COMPLETED)[0]
+    time.sleep(timeout)
+    return set()
+
+
+def _pop_due(retries: list) -> list:
+    """Pop every retry heap entry whose due time has passed."""
+    due = []
+    while retries and retries[0][0] <= time.perf_counter():
+        due.append(heapq.heappop(retries))
+    return due
+
+
+def _shutdown_pools(pools: dict) -> None:
+    pools["thread"].shutdown()
+    if "process" in pools:
+        pools["process"].shutdown()
+    if "async" in pools:
+        loop, thread = pools["async"], pools["async_thread"]
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+class DependencyScheduler(Scheduler):
+    """Starts each task as soon as all of its upstreams have succeeded.
+
+    Wave-by-wave execution holds a task back until the slowest task of the
+    previous wave finishes, even when its own upstreams are long done.
+    Here every task carries a count of unfinished upstreams; finishing a
+    task decrements its dependents' counts and submits any that reach
+    zero, all on executors that live for the whole run.
+
+    Each attempt is routed by ``Task.executor``: ``"thread"`` tasks share a
+    thread pool and the context dict itself; ``"process"`` tasks run in a
+    process pool and receive only the context keys named in
+    ``Task.inputs``, so large unrelated values are never pickled;
+    ``"async"`` tasks are coroutines on one event loop, so waiting on I/O
+    holds no thread at all.  A task publishes results by mutating the
+    context or, for any kind, by returning a dict to merge into it.
+    Retries wait on a timer instead of sleeping in a worker.
+
+    Given a ``result_store``, tasks with ``cache=True`` get a content
+    address built from their code, ``version``, declared ``inputs`` and
+    the digests of their upstreams' outputs.  A task whose address is
+    already stored is marked CACHED and its returned dict is restored
+    without running it.  Because downstream keys use output digests, a
+    re-run upstream that produces the same output leaves them cached.
+
+    ``run`` drives the DAG alone.  ``start``, ``pop_ready``, ``submit``
+    and ``complete`` expose the same steps, so a runner that shares
+    executors across many DAG runs (``BackfillRunner``) can interleave
+    them without re-implementing the bookkeeping.
+    """
+
+    def __init__(self, dag: DAG, context: dict | None = None, max_workers: int = 4,
+                 verbose: bool = True, max_processes: int | None = None,
+                 result_store: ResultStore | None = None):
+        super().__init__(dag, context, max_workers, verbose)
+        self._max_processes = max_processes
+        self._store = result_store
+
+    def _cache_key(self, task: Task) -> str:
+        material = (
+            task.task_id,
+            task.version,
+            _code_fingerprint(task.fn),
+            [(key, self._context.get(key)) for key in sorted(task.inputs)],
+            [self._dag.tasks[up].output_digest for up in task.upstream],
+        )
+        return hashlib.sha256(pickle.dumps(material)).hexdigest()
+
+    def _restore(self, task: Task) -> bool:
+        """Complete *task* from the result store if its key is there."""
+        if self._store is None or not task.cache:
+            return False
+        task.cache_key = self._cache_key(task)
+        output = self._store.get(task.cache_key)
+        if output is None:
+            return False
+        self._context.update(output)
+        task.output_digest = _digest(output)
+        task.state = TaskState.CACHED
+        return True
+
+    def _skip_downstream(self, tid: str, dependents: dict[str, list[str]]) -> int:
+        """Mark every pending task below *tid* UPSTREAM_FAILED; returns how many."""
+        skipped = 0
+        stack = list(dependents[tid])
+        while stack:
+            task = self._dag.tasks[stack.pop()]
+            if task.state == TaskState.PENDING:
+                task.state = TaskState.UPSTREAM_FAILED
+                skipped += 1
+                if self._verbose:
+                    print(f"  ↳ '{task.task_id}': UPSTREAM_FAILED (skipped)")
+                stack.extend(dependents[task.task_id])
+        return skipped
+
+    def submit(self, task: Task, pools: dict) -> Future:
+        """Start one attempt of *task* on the executor it asks for, creating it if needed."""
+        task.state = TaskState.RUNNING
+        task.attempts += 1
+        if task.executor == "process":
+            if "process" not in pools:
+                pools["process"] = ProcessPoolExecutor(max_workers=self._max_processes)
+            inputs = (self._context if task.inputs is None
+                      else {key: self._context[key] for key in task.inputs})
+            return pools["process"].submit(_timed_call, task.fn, inputs)
+        if task.executor == "async":
+            if "async" not in pools:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, daemon=True)
+                thread.start()
+                pools["async"], pools["async_thread"] = loop, thread
+            return asyncio.run_coroutine_threadsafe(
+                _timed_coroutine(task.fn, self._context), pools["async"])
+        return pools["thread"].submit(_timed_call, task.fn, self._context)
+
+    def _finish(self, task: Task, future: Future) -> float | None:
+        """Record a finished attempt; returns a retry delay if one is due."""
+        try:
+            ok, value, start, end, worker = future.result()
+        except Exception as exc:  # the attempt never ran, e.g. a broken process pool
+            now = time.perf_counter()
+            ok, value, start, end, worker = False, exc, now, now, "unknown"
+        task.duration = end - start
+        task.attempt_log.append(Attempt(task.attempts, start, end, worker,
+                                        None if ok else str(value)))
+        if ok:
+            output = value if isinstance(value, dict) else {}
+            self._context.update(output)
+            task.output_digest = _digest(output)
+            if task.cache_key is not None:
+                self._store.put(task.cache_key, output)
+            task.state = TaskState.SUCCESS
+            return None
+        task.error = str(value)
+        if task.attempts <= task.retries:
+            delay = task.retry_delay * 2 ** (task.attempts - 1)  # exponential backoff
+            if self._verbose:
+                print(
+                    f"    [RETRY {task.attempts}/{task.retries}] "
+                    f"'{task.task_id}' failed: {value}  "
+                    f"(waiting {delay:.1f}s)"
+                )
+            return delay
+        task.state = TaskState.FAILED
+        return None
+
+    def start(self) -> None:
+        """Reset per-run bookkeeping and queue the tasks with no upstreams."""
+        self._dag._validate()
+        self._remaining, self._dependents = self._dag.dependency_counts()
+        self._ready = deque(self._dag.tasks[tid]
+                            for tid, count in self._remaining.items() if count == 0)
+        self._open = len(self._dag.tasks)
+        self._all_ok = True
+
+    def _settle(self, task: Task) -> None:
+        """Account for a task that reached a final state and queue what it unblocks."""
+        self._report(task)
+        self._open -= 1
+        if task.state not in DONE_STATES:
+            self._all_ok = False
+            self._open -= self._skip_downstream(task.task_id, self._dependents)
+            return
+        for tid in self._dependents[task.task_id]:
+            self._remaining[tid] -= 1
+            if self._remaining[tid] == 0 and self._dag.tasks[tid].state == TaskState.PENDING:
+                self._ready.append(self._dag.tasks[tid])
+
+    def pop_ready(self) -> list[Task]:
+        """Take the tasks whose upstreams are done; cached ones complete on the spot."""
+        tasks = []
+        while self._ready:
+            task = self._ready.popleft()
+            if self._restore(task):
+                self._settle(task)  # may make more tasks ready without running anything
+            else:
+                tasks.append(task)
+        return tasks
+
+    def complete(self, task: Task, future: Future) -> float | None:
+        """Record a finished attempt; returns a retry delay, or None once *task* is final."""
+        delay = self._finish(task, future)
+        if delay is None:
+            self._settle(task)
+        return delay
+
+    @property
+    def done(self) -> bool:
+        """Whether every task has reached a final state."""
+        return self._open == 0
+
+    @property
+    def ok(self) -> bool:
+        """Whether every task that reached a final state succeeded or was cached."""
+        return self._all_ok
+
+    def run(self) -> bool:
+        """Run the DAG from a ready queue; returns True if all tasks succeeded."""
+        self.start()
+        pools: dict = {"thread": ThreadPoolExecutor(max_workers=self._max_workers)}
+        running: dict[Future, Task] = {}
+        retries: list[tuple[float, int, Task]] = []  # heap of (due, seq, task)
+
+        try:
+            while not self.done:
+                for task in self.pop_ready():
+                    running[self.submit(task, pools)] = task
+                if not running and not retries:
+                    break
+                for future in _wait_for_work(running, retries):
+                    task = running.pop(future)
+                    delay = self.complete(task, future)
+                    if delay is not None:
+                        heapq.heappush(retries, (time.perf_counter() + delay, id(task), task))
+                for _, _, task in _pop_due(retries):
+                    running[self.submit(task, pools)] = task
+        finally:
+            _shutdown_pools(pools)
+
+        return self.ok
+
+
 # ---------------------------------------------------------------------------
 # Demo pipeline: ETL workflow
 # ---------------------------------------------------------------------------
 
-def make_etl_dag(fail_transform: bool = False) -> DAG:
+def make_etl_dag(fail_transform: bool = False, verbose: bool = True,
+                 time_scale: float = 1.0) -> DAG:
     """
     Build a small ETL DAG:
 
@@ -227,43 +644,49 @@ def make_etl_dag(fail_transform: bool = False) -> DAG:
                       ├──> join_sources ──> transform ──> load ──> notify
       extract_erp  ──┘          │
                                  └──> validate (runs in parallel with transform)
+
+    *time_scale* shrinks every simulated duration, for runs of many partitions.
     """
     rng = random.Random(42)
+    log = print if verbose else lambda *args: None
+
+    def pause(low: float, high: float) -> None:
+        time.sleep(rng.uniform(low, high) * time_scale)
 
     def extract_crm(ctx: dict) -> None:
-        time.sleep(rng.uniform(0.02, 0.05))
+        pause(0.02, 0.05)
         ctx["crm_records"] = 1_200
-        print(f"      extracted {ctx['crm_records']:,} CRM records")
+        log(f"      extracted {ctx['crm_records']:,} CRM records")
 
     def extract_erp(ctx: dict) -> None:
-        time.sleep(rng.uniform(0.02, 0.05))
+        pause(0.02, 0.05)
         ctx["erp_records"] = 850
-        print(f"      extracted {ctx['erp_records']:,} ERP records")
+        log(f"      extracted {ctx['erp_records']:,} ERP records")
 
     def join_sources(ctx: dict) -> None:
-        time.sleep(rng.uniform(0.03, 0.06))
+        pause(0.03, 0.06)
         ctx["joined_records"] = ctx["crm_records"] + ctx["erp_records"]
-        print(f"      joined: {ctx['joined_records']:,} records")
+        log(f"      joined: {ctx['joined_records']:,} records")
 
     def validate(ctx: dict) -> None:
-        time.sleep(rng.uniform(0.01, 0.03))
+        pause(0.01, 0.03)
         ctx["validation_passed"] = True
-        print(f"      validated {ctx['joined_records']:,} records – OK")
+        log(f"      validated {ctx['joined_records']:,} records – OK")
 
     def transform(ctx: dict) -> None:
-        time.sleep(rng.uniform(0.04, 0.08))
+        pause(0.04, 0.08)
         if fail_transform:
             raise RuntimeError("Schema mismatch in column 'amount'")
         ctx["transformed_records"] = int(ctx["joined_records"] * 0.92)
-        print(f"      transformed to {ctx['transformed_records']:,} clean records")
+        log(f"      transformed to {ctx['transformed_records']:,} clean records")
 
     def load(ctx: dict) -> None:
-        time.sleep(rng.uniform(0.02, 0.05))
+        pause(0.02, 0.05)
         ctx["loaded"] = ctx["transformed_records"]
-        print(f"      loaded {ctx['loaded']:,} records into warehouse")
+        log(f"      loaded {ctx['loaded']:,} records into warehouse")
 
     def notify(ctx: dict) -> None:
-        print(f"      sent completion notification  (rows_loaded={ctx.get('loaded', 0):,})")
+        log(f"      sent completion notification  (rows_loaded={ctx.get('loaded', 0):,})")
 
     dag = DAG("daily_etl")
     dag.add_task(Task("extract_crm", extract_crm))
@@ -295,6 +718,517 @@ def simulate_backfill(dates: list[str]) -> None:
         print(f"  Partition {ds}: {status}\n")
 
 
+# ---------------------------------------------------------------------------
+# Parallel backfill
+# ---------------------------------------------------------------------------
+
+class BackfillRunner:
+    """Runs one DAG for many partitions at once on executors shared by all runs.
+
+    Runs are admitted in order, by date or by ``priority`` (higher first,
+    then date), while fewer than *max_active_runs* are in flight.  Ready
+    tasks from every active run share one heap keyed by run rank, so
+    earlier runs finish first instead of all runs crawling forward
+    together.  A task is only handed to an executor when that executor
+    has a free worker and its task type (``Task.task_type`` or the task
+    id) is below its limit in *type_limits*, e.g. to protect a source
+    system from too many concurrent extracts.
+    """
+
+    def __init__(self, dag_factory: Callable[[str], DAG], max_active_runs: int = 16,
+                 max_workers: int = 16, type_limits: dict[str, int] | None = None,
+                 order: str = "date", priority: Callable[[str], int] | None = None,
+                 max_processes: int | None = None, result_store: ResultStore | None = None):
+        if order not in ("date", "newest_first", "priority"):
+            raise ValueError(f"Unknown run order '{order}'")
+        self._dag_factory = dag_factory
+        self._max_active_runs = max_active_runs
+        self._max_workers = max_workers
+        self._type_limits = type_limits or {}
+        self._order = order
+        self._priority = priority or (lambda ds: 0)
+        self._max_processes = max_processes or os.cpu_count() or 1
+        self._store = result_store
+        self.peak_by_type: Counter = Counter()
+
+    def _ordered(self, dates: list[str]) -> list[str]:
+        if self._order == "priority":
+            return sorted(dates, key=lambda ds: (-self._priority(ds), ds))
+        return sorted(dates, reverse=self._order == "newest_first")
+
+    def run(self, dates: list[str]) -> dict[str, bool]:
+        """Run every partition; returns {date: all tasks succeeded}, in completion order."""
+        waiting = deque(enumerate(self._ordered(dates)))
+        active: dict[int, tuple[str, DependencyScheduler]] = {}
+        ready: list[tuple[int, int, Task]] = []       # heap of (run rank, seq, task)
+        running: dict[Future, tuple[int, Task]] = {}
+        retries: list[tuple[float, int, int, Task]] = []  # heap of (due, seq, rank, task)
+        in_flight: Counter = Counter()                 # per executor kind and per task type
+        capacity = {"thread": self._max_workers, "process": self._max_processes}
+        pools: dict = {"thread": ThreadPoolExecutor(max_workers=self._max_workers),
+                       "process": ProcessPoolExecutor(max_workers=self._max_processes)}
+        results: dict[str, bool] = {}
+        seq = itertools.count()
+
+        def collect(rank: int) -> None:
+            ds, scheduler = active[rank]
+            for task in scheduler.pop_ready():
+                heapq.heappush(ready, (rank, next(seq), task))
+            if scheduler.done:
+                results[ds] = scheduler.ok
+                del active[rank]
+
+        try:
+            while waiting or active:
+                while waiting and len(active) < self._max_active_runs:
+                    rank, ds = waiting.popleft()
+                    scheduler = DependencyScheduler(
+                        self._dag_factory(ds), context={"execution_date": ds},
+                        verbose=False, result_store=self._store)
+                    scheduler.start()
+                    active[rank] = (ds, scheduler)
+                    collect(rank)
+
+                blocked = []
+                while ready:
+                    rank, order, task = heapq.heappop(ready)
+                    kind = task.task_type or task.task_id
+                    if (in_flight[task.executor] >= capacity.get(task.executor, float("inf"))
+                            or in_flight[kind] >= self._type_limits.get(kind, float("inf"))):
+                        blocked.append((rank, order, task))
+                        continue
+                    in_flight[task.executor] += 1
+                    in_flight[kind] += 1
+                    self.peak_by_type[kind] = max(self.peak_by_type[kind], in_flight[kind])
+                    running[active[rank][1].submit(task, pools)] = (rank, task)
+                for item in blocked:
+                    heapq.heappush(ready, item)
+
+                if not running and not retries:
+                    continue
+                for future in _wait_for_work(running, retries):
+                    rank, task = running.pop(future)
+                    in_flight[task.executor] -= 1
+                    in_flight[task.task_type or task.task_id] -= 1
+                    delay = active[rank][1].complete(task, future)
+                    if delay is not None:
+                        heapq.heappush(retries, (time.perf_counter() + delay, next(seq), rank, task))
+                    else:
+                        collect(rank)
+                for _, order, rank, task in _pop_due(retries):
+                    heapq.heappush(ready, (rank, order, task))
+        finally:
+            _shutdown_pools(pools)
+
+        return results
+
+
+def run_sequential_backfill(dates: list[str], time_scale: float) -> dict[str, bool]:
+    """The simulate_backfill path without its output: one wave-based run per date."""
+    results = {}
+    for ds in dates:
+        dag = make_etl_dag(verbose=False, time_scale=time_scale)
+        results[ds] = Scheduler(dag, context={"execution_date": ds}, verbose=False).run()
+    return results
+
+
+def benchmark_backfill(days: int = 365, time_scale: float = 0.1,
+                       max_active_runs: int = 32, max_workers: int = 32) -> None:
+    """Total time of a year of daily runs: sequential vs the parallel backfill runner."""
+    first = date(2024, 1, 1)
+    dates = [(first + timedelta(days=i)).isoformat() for i in range(days)]
+    limits = {"extract_crm": 8, "extract_erp": 8, "load": 4}
+    print(f"  {days} daily runs of daily_etl, task durations x{time_scale}; "
+          f"limits {limits}\n")
+
+    start = time.perf_counter()
+    sequential = run_sequential_backfill(dates, time_scale)
+    seq_elapsed = time.perf_counter() - start
+    print(f"    sequential                 : {seq_elapsed:6.2f} s  "
+          f"({sum(sequential.values())}/{days} runs ok)")
+
+    def month_end(ds: str) -> int:
+        """Month-end partitions feed monthly reports, so they are backfilled first."""
+        return int((date.fromisoformat(ds) + timedelta(days=1)).day == 1)
+
+    for order in ("date", "priority"):
+        runner = BackfillRunner(
+            lambda ds: make_etl_dag(verbose=False, time_scale=time_scale),
+            max_active_runs=max_active_runs, max_workers=max_workers,
+            type_limits=limits, order=order, priority=month_end)
+        start = time.perf_counter()
+        results = runner.run(dates)
+        elapsed = time.perf_counter() - start
+        label = f"parallel, order={order}"
+        print(f"    {label:<27}: {elapsed:6.2f} s  x{seq_elapsed / elapsed:.1f}  "
+              f"({sum(results.values())}/{days} runs ok)")
+        print(f"    {'':<27}  first done: {', '.join(list(results)[:3])}")
+    peaks = {kind: runner.peak_by_type[kind] for kind in limits}
+    print(f"    peak concurrency of limited task types: {peaks}")
+
+
+# ---------------------------------------------------------------------------
+# Scheduler comparison
+# ---------------------------------------------------------------------------
+
+def make_uneven_dag(branches: int = 8, depth: int = 4, seed: int = 7) -> tuple[DAG, float]:
+    """
+    Build *branches* independent chains of *depth* tasks feeding one final
+    task.  Durations are exponential (mean 20 ms, capped at 150 ms), so
+    most tasks are short and a few are long.  Returns the DAG and its
+    critical-path length, the makespan lower bound.
+    """
+    rng = random.Random(seed)
+    dag = DAG("uneven")
+    longest = 0.0
+
+    def sleeper(seconds: float) -> Callable[[dict], None]:
+        return lambda ctx: time.sleep(seconds)
+
+    for b in range(branches):
+        chain = 0.0
+        for d in range(depth):
+            seconds = min(rng.expovariate(1 / 0.02), 0.15)
+            chain += seconds
+            upstream = [f"b{b}_s{d - 1}"] if d else []
+            dag.add_task(Task(f"b{b}_s{d}", sleeper(seconds), upstream=upstream))
+        longest = max(longest, chain)
+    dag.add_task(Task("report", sleeper(0.005),
+                      upstream=[f"b{b}_s{depth - 1}" for b in range(branches)]))
+    return dag, longest + 0.005
+
+
+def compare_schedulers(branches: int = 8, depth: int = 4, repeats: int = 3) -> None:
+    """Makespan of wave-by-wave vs ready-queue scheduling on uneven DAGs."""
+    print(f"  {branches} chains x {depth} tasks, exponential durations (mean 20 ms)\n")
+    for workers in (branches, branches // 2):
+        for seed in range(repeats):
+            row = []
+            for scheduler_cls in (Scheduler, DependencyScheduler):
+                dag, critical_path = make_uneven_dag(branches, depth, seed)
+                scheduler = scheduler_cls(dag, max_workers=workers, verbose=False)
+                start = time.perf_counter()
+                scheduler.run()
+                row.append(time.perf_counter() - start)
+            waves, ready = row
+            print(f"    workers={workers}  seed={seed}:  waves {waves * 1000:4.0f} ms   "
+                  f"ready queue {ready * 1000:4.0f} ms   x{waves / ready:.2f}   "
+                  f"(critical path {critical_path * 1000:.0f} ms)")
+
+
+# ---------------------------------------------------------------------------
+# Executor routing
+# ---------------------------------------------------------------------------
+
+def _crunch(name: str, ctx: dict) -> dict:
+    """CPU-bound task: pure-Python arithmetic that holds the GIL throughout."""
+    return {name: sum(i * i % 7 for i in range(ctx["work"]))}
+
+
+def _fetch_blocking(ctx: dict) -> None:
+    time.sleep(ctx["io_latency"])
+
+
+async def _fetch_async(ctx: dict) -> None:
+    await asyncio.sleep(ctx["io_latency"])
+
+
+def make_mixed_dag(cpu_tasks: int = 4, io_tasks: int = 32, routed: bool = True,
+                   declare_inputs: bool = True) -> DAG:
+    """
+    I/O fetches fan in to CPU-bound crunch tasks, then a final publish step.
+    With *routed*, fetches run as coroutines and crunches in processes;
+    otherwise everything runs in the thread pool.
+    """
+    dag = DAG("mixed")
+    for i in range(io_tasks):
+        if routed:
+            dag.add_task(Task(f"fetch_{i}", _fetch_async, executor="async"))
+        else:
+            dag.add_task(Task(f"fetch_{i}", _fetch_blocking))
+    per_crunch = io_tasks // cpu_tasks
+    for c in range(cpu_tasks):
+        upstream = [f"fetch_{i}" for i in range(c * per_crunch, (c + 1) * per_crunch)]
+        dag.add_task(Task(f"crunch_{c}", partial(_crunch, f"crunch_{c}"), upstream=upstream,
+                          executor="process" if routed else "thread",
+                          inputs=["work"] if declare_inputs else None))
+    dag.add_task(Task("publish", lambda ctx: None,
+                      upstream=[f"crunch_{c}" for c in range(cpu_tasks)]))
+    return dag
+
+
+def benchmark_executors(cpu_tasks: int = 4, io_tasks: int = 32, max_workers: int = 4,
+                        work: int = 300_000, io_latency: float = 0.05) -> None:
+    """Wall time of a mixed CPU/I-O DAG: all threads vs per-task executor routing."""
+    print(f"  {io_tasks} I/O tasks ({io_latency * 1000:.0f} ms each) feeding {cpu_tasks} "
+          f"CPU tasks; {max_workers} threads, {os.cpu_count()} CPU(s)")
+    # A large value most tasks never read, standing in for a shared lookup table.
+    base = {"work": work, "io_latency": io_latency, "lookup": list(range(2_000_000))}
+    print(f"  pickled context: full {len(pickle.dumps(base)) / 1e6:.1f} MB, "
+          f"declared inputs {len(pickle.dumps({'work': work}))} bytes\n")
+
+    results = {}
+    for label, routed, declare in [
+        ("all threads                   ", False, True),
+        ("routed, full context shipped  ", True, False),
+        ("routed, declared inputs       ", True, True),
+    ]:
+        ctx = dict(base)
+        dag = make_mixed_dag(cpu_tasks, io_tasks, routed=routed, declare_inputs=declare)
+        scheduler = DependencyScheduler(dag, context=ctx, max_workers=max_workers,
+                                        verbose=False)
+        start = time.perf_counter()
+        ok = scheduler.run()
+        elapsed = time.perf_counter() - start
+        results[label] = [ctx[f"crunch_{c}"] for c in range(cpu_tasks)]
+        print(f"    {label}: {elapsed * 1000:5.0f} ms  ok={ok}")
+    same = len({tuple(r) for r in results.values()}) == 1
+    print(f"    identical results: {same}")
+
+
+# ---------------------------------------------------------------------------
+# Incremental re-runs
+# ---------------------------------------------------------------------------
+
+def make_sales_dag(regions: tuple = ("emea", "apac", "amer"),
+                   clean_version: str = "1", fail_report: bool = False) -> DAG:
+    """
+    Per-region extract -> clean chains feeding aggregate -> report, where
+    every task is cacheable and publishes its output by returning it.
+
+      extract_<r> ──> clean_<r> ──┐
+                                  ├──> aggregate ──> report
+      ...          ──> ...     ───┘
+    """
+    def extract(region: str) -> Callable[[dict], dict]:
+        def fn(ctx: dict) -> dict:
+            time.sleep(0.08)
+            rng = random.Random(f"{ctx['execution_date']}:{region}")
+            rows = [round(rng.uniform(1, 100), 2) for _ in range(1_000)]
+            return {f"raw_{region}": [r for r in rows if r >= ctx[f"min_amount_{region}"]]}
+        return fn
+
+    def clean(region: str) -> Callable[[dict], dict]:
+        def fn(ctx: dict) -> dict:
+            time.sleep(0.06)
+            return {f"clean_{region}": round(sum(ctx[f"raw_{region}"]), 2)}
+        return fn
+
+    def aggregate(ctx: dict) -> dict:
+        time.sleep(0.05)
+        return {"total": round(sum(ctx[f"clean_{r}"] for r in regions), 2)}
+
+    def report(ctx: dict) -> dict:
+        time.sleep(0.02)
+        if fail_report:
+            raise RuntimeError("report service unavailable")
+        return {"report": f"{ctx['execution_date']}: {ctx['total']:,.2f}"}
+
+    dag = DAG("sales")
+    for r in regions:
+        dag.add_task(Task(f"extract_{r}", extract(r), cache=True,
+                          inputs=["execution_date", f"min_amount_{r}"]))
+        dag.add_task(Task(f"clean_{r}", clean(r), upstream=[f"extract_{r}"], cache=True,
+                          inputs=[], version=clean_version if r == "emea" else "1"))
+    dag.add_task(Task("aggregate", aggregate, upstream=[f"clean_{r}" for r in regions],
+                      cache=True, inputs=[]))
+    dag.add_task(Task("report", report, upstream=["aggregate"], cache=True, inputs=[],
+                      retries=0))
+    return dag
+
+
+def benchmark_caching() -> None:
+    """Run time of cold, unchanged and partially changed DAG runs over one result store."""
+    base = {"execution_date": "2024-01-10",
+            "min_amount_emea": 0, "min_amount_apac": 0, "min_amount_amer": 0}
+    scenarios = [
+        ("cold run", {}, {}),
+        ("unchanged re-run", {}, {}),
+        ("apac filter changed", {"min_amount_apac": 50}, {}),
+        ("clean_emea v2, same output", {"min_amount_apac": 50}, {"clean_version": "2"}),
+        ("report fails", {"execution_date": "2024-01-11"}, {"fail_report": True}),
+        ("re-run after the failure", {"execution_date": "2024-01-11"}, {}),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(tmp)
+        cold = cold_work = None
+        for label, overrides, dag_args in scenarios:
+            dag = make_sales_dag(**dag_args)
+            scheduler = DependencyScheduler(dag, context={**base, **overrides},
+                                            verbose=False, result_store=store)
+            start = time.perf_counter()
+            ok = scheduler.run()
+            elapsed = time.perf_counter() - start
+            work = sum(t.duration for t in dag.tasks.values())
+            cold, cold_work = cold or elapsed, cold_work or work
+            ran = [t.task_id for t in dag.tasks.values() if t.attempts]
+            cached = sum(t.state == TaskState.CACHED for t in dag.tasks.values())
+            print(f"  {label:<27}: wall {elapsed * 1000:4.0f} ms ({1 - elapsed / cold:4.0%} saved)  "
+                  f"task time {work * 1000:4.0f} ms ({1 - work / cold_work:4.0%} saved)  "
+                  f"cached {cached}/{len(dag.tasks)}  ok={ok}")
+            if 0 < len(ran) < len(dag.tasks):
+                print(f"  {'':<29}ran: {', '.join(ran)}")
+
+
+# ---------------------------------------------------------------------------
+# Run analysis
+# ---------------------------------------------------------------------------
+
+def _task_span(task: Task) -> float:
+    """First attempt start to last attempt end, so retries and backoff count."""
+    if not task.attempt_log:
+        return 0.0
+    return task.attempt_log[-1].end - task.attempt_log[0].start
+
+
+def critical_path(dag: DAG) -> tuple[list[str], dict[str, float]]:
+    """
+    Return the critical path through a finished run and each task's slack:
+    how much longer it could have taken without delaying the run, given
+    the observed task spans and unlimited workers.  Cached and skipped
+    tasks count as zero-length.
+    """
+    order = [tid for wave in dag.topological_sort() for tid in wave]
+    _, dependents = dag.dependency_counts()
+    span = {tid: _task_span(dag.tasks[tid]) for tid in order}
+
+    earliest_finish: dict[str, float] = {}
+    for tid in order:
+        ready = max((earliest_finish[up] for up in dag.tasks[tid].upstream), default=0.0)
+        earliest_finish[tid] = ready + span[tid]
+    makespan = max(earliest_finish.values(), default=0.0)
+
+    latest_finish: dict[str, float] = {}
+    for tid in reversed(order):
+        latest_finish[tid] = min((latest_finish[d] - span[d] for d in dependents[tid]),
+                                 default=makespan)
+    slack = {tid: max(0.0, latest_finish[tid] - earliest_finish[tid]) for tid in order}
+
+    path: list[str] = []
+    if order:
+        path.append(max(order, key=earliest_finish.get))
+        while dag.tasks[path[-1]].upstream:
+            path.append(max(dag.tasks[path[-1]].upstream, key=earliest_finish.get))
+    return path[::-1], slack
+
+
+def _lanes(dag: DAG) -> dict[tuple[int, str], list[tuple[Task, Attempt]]]:
+    """Group attempts by the worker that ran them, in order of first use.
+
+    Coroutines interleave on a single event loop, so their attempts are
+    packed greedily into as many lanes as were concurrently in flight.
+    """
+    lanes: dict[tuple[int, str], list[tuple[Task, Attempt]]] = defaultdict(list)
+    loop_lanes: list[float] = []  # end time of the last attempt in each event-loop lane
+    attempts = sorted(((t, a) for t in dag.tasks.values() for a in t.attempt_log),
+                      key=lambda item: item[1].start)
+    for task, attempt in attempts:
+        pid, name = attempt.worker.split(":", 1)
+        if name == "event loop":
+            lane = next((i for i, end in enumerate(loop_lanes) if end <= attempt.start),
+                        len(loop_lanes))
+            if lane == len(loop_lanes):
+                loop_lanes.append(0.0)
+            loop_lanes[lane] = attempt.end
+            name = f"event loop #{lane}"
+        lanes[(int(pid) if pid.isdigit() else 0, name)].append((task, attempt))
+    return lanes
+
+
+def worker_utilization(dag: DAG) -> dict[str, float]:
+    """Busy share of the run's wall time for each worker lane."""
+    attempts = [a for t in dag.tasks.values() for a in t.attempt_log]
+    if not attempts:
+        return {}
+    wall = max(a.end for a in attempts) - min(a.start for a in attempts)
+    return {f"{pid}:{name}": sum(a.end - a.start for _, a in items) / wall
+            for (pid, name), items in _lanes(dag).items()}
+
+
+def to_chrome_trace(dag: DAG, path: str | None = None) -> dict:
+    """
+    Build (and optionally write) a Chrome trace-event timeline of a run,
+    viewable in chrome://tracing or https://ui.perfetto.dev: one row per
+    worker with a slice per attempt, explicit "idle" slices in the gaps,
+    and a counter of how many tasks were running at once.
+    """
+    attempts = [a for t in dag.tasks.values() for a in t.attempt_log]
+    if not attempts:
+        return {"traceEvents": []}
+    origin = min(a.start for a in attempts)
+    finish = max(a.end for a in attempts)
+    cp, slack = critical_path(dag)
+    on_path = set(cp)
+
+    def us(t: float) -> float:
+        return round((t - origin) * 1e6, 1)
+
+    events: list[dict] = []
+    for tid, ((pid, name), items) in enumerate(_lanes(dag).items(), start=1):
+        events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                       "args": {"name": name}})
+        cursor = origin
+        for task, attempt in items:
+            if attempt.start > cursor:
+                events.append({"ph": "X", "name": "idle", "cat": "idle", "cname": "grey",
+                               "pid": pid, "tid": tid, "ts": us(cursor),
+                               "dur": round(us(attempt.start) - us(cursor), 1)})
+            events.append({
+                "ph": "X", "name": task.task_id, "cat": task.executor,
+                "pid": pid, "tid": tid, "ts": us(attempt.start),
+                "dur": round(us(attempt.end) - us(attempt.start), 1),
+                "cname": "terrible" if task.task_id in on_path else None,
+                "args": {"attempt": attempt.number, "error": attempt.error,
+                         "state": task.state.name, "critical": task.task_id in on_path,
+                         "slack_ms": round(slack[task.task_id] * 1000, 2)},
+            })
+            cursor = max(cursor, attempt.end)
+        if finish > cursor:
+            events.append({"ph": "X", "name": "idle", "cat": "idle", "cname": "grey",
+                           "pid": pid, "tid": tid, "ts": us(cursor),
+                           "dur": round(us(finish) - us(cursor), 1)})
+
+    changes = sorted([(a.start, 1) for a in attempts] + [(a.end, -1) for a in attempts])
+    running = 0
+    for t, delta in changes:
+        running += delta
+        events.append({"ph": "C", "name": "running tasks", "pid": os.getpid(),
+                       "ts": us(t), "args": {"running": running}})
+
+    trace = {"traceEvents": [{k: v for k, v in e.items() if v is not None} for e in events],
+             "displayTimeUnit": "ms"}
+    if path is not None:
+        with open(path, "w") as fh:
+            json.dump(trace, fh)
+    return trace
+
+
+def demonstrate_run_analysis(branches: int = 8, depth: int = 4, max_workers: int = 4) -> None:
+    """Critical path, slack, worker utilization and a trace file for one run."""
+    dag, _ = make_uneven_dag(branches, depth, seed=2)
+    start = time.perf_counter()
+    DependencyScheduler(dag, max_workers=max_workers, verbose=False).run()
+    makespan = time.perf_counter() - start
+
+    cp, slack = critical_path(dag)
+    cp_length = sum(_task_span(dag.tasks[tid]) for tid in cp)
+    print(f"  makespan {makespan * 1000:.0f} ms with {max_workers} workers; critical path "
+          f"{cp_length * 1000:.0f} ms over {len(cp)} tasks:")
+    print("    " + " -> ".join(f"{tid} ({_task_span(dag.tasks[tid]) * 1000:.0f} ms)"
+                               for tid in cp))
+    longest = sorted(cp, key=lambda tid: -_task_span(dag.tasks[tid]))[:2]
+    print(f"  optimize first: {', '.join(longest)}  (longest tasks on the critical path)")
+    loose = sorted(slack, key=slack.get, reverse=True)[:3]
+    print("  most slack: " + ", ".join(f"{tid} {slack[tid] * 1000:.0f} ms" for tid in loose))
+    busy = worker_utilization(dag)
+    print("  worker busy share: " + ", ".join(f"{share:.0%}" for share in busy.values())
+          + f"  (gap to critical path: {(makespan - cp_length) * 1000:.0f} ms of queueing)")
+
+    path = os.path.join(tempfile.gettempdir(), "workflow_trace.json")
+    trace = to_chrome_trace(dag, path)
+    print(f"  wrote {len(trace['traceEvents'])} trace events to {path}")
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -330,7 +1264,42 @@ def main() -> None:
     # --- 3. Backfill ---
     simulate_backfill(["2024-01-08", "2024-01-09", "2024-01-10"])
 
-    # --- 4. Summary of concepts ---
+    # --- 4. Wave vs ready-queue scheduling ---
+    print("=" * 60)
+    print("[4] Wave-by-wave vs ready-queue scheduling")
+    print("=" * 60)
+    compare_schedulers()
+    print()
+
+    # --- 5. Executor routing ---
+    print("=" * 60)
+    print("[5] Thread, process and async executors on a mixed DAG")
+    print("=" * 60)
+    benchmark_executors()
+    print()
+
+    # --- 6. Result caching ---
+    print("=" * 60)
+    print("[6] Content-addressed result caching across re-runs")
+    print("=" * 60)
+    benchmark_caching()
+    print()
+
+    # --- 7. Parallel backfill ---
+    print("=" * 60)
+    print("[7] Parallel backfill of a year of daily partitions")
+    print("=" * 60)
+    benchmark_backfill()
+    print()
+
+    # --- 8. Run analysis ---
+    print("=" * 60)
+    print("[8] Critical path, slack and timeline of a run")
+    print("=" * 60)
+    demonstrate_run_analysis()
+    print()
+
+    # --- 9. Summary of concepts ---
     print("=" * 60)
     print("Key orchestration concepts demonstrated")
     print("=" * 60)
@@ -341,15 +1310,31 @@ def main() -> None:
     print("  2. Parallel waves     – tasks with no mutual dependencies run")
     print("     concurrently, reducing total wall-clock time.")
     print()
-    print("  3. Retries + backoff  – transient failures are retried with")
+    print("  3. Ready queue        – starting each task the moment its")
+    print("     upstreams succeed removes the wait for the slowest task")
+    print("     in the previous wave.")
+    print()
+    print("  4. Executor routing   – CPU-bound tasks run in processes and")
+    print("     I/O-bound coroutines on an event loop, each fed only the")
+    print("     context it declares.")
+    print()
+    print("  5. Result caching     – a task keyed by its code, inputs and")
+    print("     upstream outputs is restored instead of re-run when none")
+    print("     of them changed.")
+    print()
+    print("  6. Retries + backoff  – transient failures are retried with")
     print("     exponential delay before marking a task as FAILED.")
     print()
-    print("  4. Failure propagation– downstream tasks are automatically")
+    print("  7. Failure propagation– downstream tasks are automatically")
     print("     marked UPSTREAM_FAILED when a dependency fails, preventing")
     print("     partial or inconsistent pipeline results.")
     print()
-    print("  5. Backfill           – the same DAG runs for historical")
-    print("     partitions to re-process or recover missing data.")
+    print("  8. Backfill           – the same DAG runs for historical")
+    print("     partitions to re-process or recover missing data; many")
+    print("     runs can share executors under per-task-type limits.")
+    print()
+    print("  9. Run analysis       – per-attempt timestamps give the critical")
+    print("     path, each task's slack and a trace of worker idle time.")
 
 
 if __name__ == "__main__":